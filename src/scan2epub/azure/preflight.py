@@ -4,13 +4,7 @@ import os
 from pathlib import Path
 from typing import Optional
 
-import requests
-import openai
-from azure.storage.blob import BlobServiceClient
-from azure.core.exceptions import AzureError
-
 from scan2epub.config import AppConfig
-from scan2epub.translate.translator import AzureTranslator
 from scan2epub.utils.errors import ConfigError, TranslationError
 
 logger = logging.getLogger("scan2epub.azure.preflight")
@@ -47,6 +41,8 @@ class PreflightChecker:
         if not conn_string:
             self._status("storage_failed", error="Missing AZURE_STORAGE_CONNECTION_STRING")
             raise ConfigError("Missing AZURE_STORAGE_CONNECTION_STRING for Azure Storage preflight")
+        from azure.storage.blob import BlobServiceClient  # lazy: only OCR paths touch Storage
+        from azure.core.exceptions import AzureError
         try:
             bsc = BlobServiceClient.from_connection_string(conn_string)
             container = self.cfg.azure_storage.container_name
@@ -70,6 +66,7 @@ class PreflightChecker:
             self._status("cu_failed", error="Missing AZURE_CU_ENDPOINT or AZURE_CU_API_KEY")
             raise ConfigError("Missing AZURE_CU_ENDPOINT or AZURE_CU_API_KEY for Content Understanding preflight")
         url = f"{endpoint}/contentunderstanding/analyzers"
+        import requests
         try:
             resp = requests.get(
                 url,
@@ -99,6 +96,7 @@ class PreflightChecker:
         if not all([api_key, endpoint, deployment]):
             self._status("openai_failed", error="Missing Azure OpenAI credentials/deployment")
             raise ConfigError("Missing Azure OpenAI credentials/deployment for OpenAI preflight")
+        import openai  # lazy: only commands that clean need the SDK loaded
         try:
             client = openai.AzureOpenAI(api_key=api_key, api_version=api_version, azure_endpoint=endpoint)
             # Tiny ping request
@@ -128,6 +126,7 @@ class PreflightChecker:
         if not api_key:
             self._status("translator_failed", error="Missing AZURE_TRANSLATOR_KEY")
             raise ConfigError("Missing AZURE_TRANSLATOR_KEY for Translator preflight")
+        from scan2epub.translate.translator import AzureTranslator
         try:
             translator = AzureTranslator(endpoint=endpoint, api_key=api_key, region=region, api_version=api_version)
             translator.preflight_check(to_lang or self.cfg.translator.default_target_language or "en")
@@ -18,6 +18,9 @@ from tqdm import tqdm
 from scan2epub.utils.errors import StorageError
 from scan2epub.config import AzureStorageConfig
 
+# Files above this size are uploaded as parallel blocks instead of one PUT (SDK default: 64 MiB)
+_MAX_SINGLE_PUT_SIZE = 8 * 1024 * 1024
+
 
 class AzureStorageHandler:
     """Handles Azure Blob Storage operations for temporary PDF storage"""
@@ -47,7 +50,10 @@ class AzureStorageHandler:
 
         # Initialize blob service client (use injected client if provided)
         self.blob_service_client = (
-            blob_service_client or BlobServiceClient.from_connection_string(self.config.connection_string)
+            blob_service_client
+            or BlobServiceClient.from_connection_string(
+                self.config.connection_string, max_single_put_size=_MAX_SINGLE_PUT_SIZE
+            )
         )
         self.container_name = self.config.container_name
 
@@ -131,6 +137,7 @@ class AzureStorageHandler:
                     blob_client.upload_blob(
                         data,
                         overwrite=True,
+                        max_concurrency=self.config.upload_concurrency,
                         progress_hook=progress_callback
                     )
             
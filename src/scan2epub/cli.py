@@ -9,7 +9,6 @@ from dotenv import load_dotenv
 from scan2epub.config import AppConfig
 from scan2epub.pipeline import run_ocr_to_epub, run_cleanup, run_full_pipeline, run_translate
 from scan2epub.azure.preflight import PreflightChecker
-from scan2epub.azure.diagnostics import AzureConfigTester
 from scan2epub.utils.io import get_unique_debug_dir
 from scan2epub.utils.logging import setup_logging
 
@@ -21,7 +20,6 @@ def _compute_debug_dir(output_file: str, enabled: bool) -> Optional[Path]:
     debug_base_name = output_path_obj.stem
     debug_base_dir = output_path_obj.parent / debug_base_name
     debug_dir = get_unique_debug_dir(debug_base_dir)
-    debug_dir.mkdir(parents=True, exist_ok=True)
     print(f"🔍 DEBUG: Debug files will be saved to: {debug_dir}")
     return debug_dir
 
@@ -50,6 +48,11 @@ def main() -> int:
     clean_p.add_argument("input_epub", help="Input EPUB file path")
     clean_p.add_argument("output_epub", help="Output EPUB file path (.epub)")
     clean_p.add_argument("--save-interim", action="store_true", help="Save interim results to disk (reduces memory)")
+    clean_p.add_argument("--batch-api", action="store_true", help="Clean via the Azure OpenAI Batch API (cheaper, not interactive)")
+    clean_p.add_argument("--stream", action="store_true", help="Stream LLM responses (live progress while each chunk is generated)")
+    clean_p.add_argument("--force-llm", action="store_true", help="Send every chunk to the LLM, even if no OCR artifacts are detected")
+    clean_p.add_argument("--cache-dir", type=str, default=None, help="Reuse cleaned chunks from (and save them to) this directory across runs")
+    clean_p.add_argument("--max-concurrency", type=int, default=4, help="Maximum number of LLM cleanup requests in flight at once (default: 4)")
     clean_p.add_argument("--status-file", type=str, default=None, help="Write incremental JSONL status to this file")
     # Optional: translate immediately after cleaning
     clean_p.add_argument("--translate-to", type=str, default=None, help="Translate cleaned EPUB to target language code (e.g., en, de)")
@@ -67,6 +70,11 @@ def main() -> int:
     conv_p.add_argument("output_epub", help="Final output EPUB file path (.epub)")
     conv_p.add_argument("--language", type=str, default="hu", help="OCR language (default: hu)")
     conv_p.add_argument("--save-interim", action="store_true", help="Save interim results to disk (reduces memory)")
+    conv_p.add_argument("--batch-api", action="store_true", help="Clean via the Azure OpenAI Batch API (cheaper, not interactive)")
+    conv_p.add_argument("--stream", action="store_true", help="Stream LLM responses (live progress while each chunk is generated)")
+    conv_p.add_argument("--force-llm", action="store_true", help="Send every chunk to the LLM, even if no OCR artifacts are detected")
+    conv_p.add_argument("--cache-dir", type=str, default=None, help="Reuse cleaned chunks from (and save them to) this directory across runs")
+    conv_p.add_argument("--max-concurrency", type=int, default=4, help="Maximum number of LLM cleanup requests in flight at once (default: 4)")
     conv_p.add_argument("--status-file", type=str, default=None, help="Write incremental JSONL status to this file during cleanup")
     # Optional: perform translation after cleanup
     conv_p.add_argument("--translate-to", type=str, default=None, help="Translate cleaned EPUB to target language code (e.g., en, de)")
@@ -84,6 +92,11 @@ def main() -> int:
     pipe_p.add_argument("output_epub", help="Final output EPUB file path (.epub)")
     pipe_p.add_argument("--language", type=str, default="hu", help="OCR language (default: hu)")
     pipe_p.add_argument("--save-interim", action="store_true", help="Save interim results to disk (reduces memory)")
+    pipe_p.add_argument("--batch-api", action="store_true", help="Clean via the Azure OpenAI Batch API (cheaper, not interactive)")
+    pipe_p.add_argument("--stream", action="store_true", help="Stream LLM responses (live progress while each chunk is generated)")
+    pipe_p.add_argument("--force-llm", action="store_true", help="Send every chunk to the LLM, even if no OCR artifacts are detected")
+    pipe_p.add_argument("--cache-dir", type=str, default=None, help="Reuse cleaned chunks from (and save them to) this directory across runs")
+    pipe_p.add_argument("--max-concurrency", type=int, default=4, help="Maximum number of LLM cleanup requests in flight at once (default: 4)")
     pipe_p.add_argument("--status-file", type=str, default=None, help="Write incremental JSONL status to this file during cleanup")
     # Optional: perform translation after cleanup
     pipe_p.add_argument("--translate-to", type=str, default=None, help="Translate cleaned EPUB to target language code (e.g., en, de)")
@@ -105,6 +118,7 @@ def main() -> int:
     trans_p.add_argument("--allow-noop-translation", action="store_true", help="Allow producing an output even if translation results in no changes")
     trans_p.add_argument("--min-changed-ratio", type=float, default=None, help="Minimum fraction of paragraphs that must change for translation to succeed (0.0-1.0)")
     trans_p.add_argument("--status-file", type=str, default=None, help="Write incremental JSONL status to this file")
+    trans_p.add_argument("--cache-dir", type=str, default=None, help="Reuse translated paragraphs from (and save them to) this directory across runs")
     trans_p.add_argument("--skip-azure-check", action="store_true", help="Skip lightweight Azure preflight checks")
     trans_p.add_argument("--config", type=str, default=None, help="Path to configuration file (default: scan2epub.ini)")
     trans_p.add_argument("--debug", action="store_true", help="Enable debug output")
@@ -138,6 +152,7 @@ def main() -> int:
     try:
         if args.command == "azure-test":
             logger.info("Running Azure configuration tests...")
+            from scan2epub.azure.diagnostics import AzureConfigTester  # heavy (openai SDK); only needed here
             tester = AzureConfigTester()
             success = tester.run_all_tests()
             return 0 if success else 1
@@ -203,6 +218,11 @@ def main() -> int:
                 save_interim=args.save_interim or app_cfg.processing.save_interim,
                 debug_dir=debug_dir,
                 status_file=status_path,
+                use_batch_api=args.batch_api,
+                stream_llm=args.stream,
+                force_llm=args.force_llm,
+                cache_dir=Path(args.cache_dir) if args.cache_dir else None,
+                max_concurrency=max(1, args.max_concurrency),
             )
             logger.info(f"EPUB cleanup completed: {args.input_epub} -> {args.output_epub}")
 
@@ -220,6 +240,7 @@ def main() -> int:
                     status_file=trans_status_path,
                     allow_noop=getattr(args, "allow_noop_translation", None),
                     min_changed_ratio=getattr(args, "min_changed_ratio", None),
+                    cache_dir=Path(args.cache_dir) if args.cache_dir else None,
                 )
                 logger.info(f"EPUB translation completed: {args.output_epub} -> {args.output_epub} [{args.translate_to}]")
             return 0
@@ -248,6 +269,7 @@ def main() -> int:
                 status_file=status_path,
                 allow_noop=getattr(args, "allow_noop_translation", None),
                 min_changed_ratio=getattr(args, "min_changed_ratio", None),
+                cache_dir=Path(args.cache_dir) if args.cache_dir else None,
             )
             logger.info(f"EPUB translation completed: {args.input_epub} -> {args.output_epub} [{args.translate_to}]")
             return 0
@@ -283,6 +305,11 @@ def main() -> int:
                 translate_provider=getattr(args, "translation_provider", None),
                 allow_noop_translation=getattr(args, "allow_noop_translation", None),
                 min_changed_ratio=getattr(args, "min_changed_ratio", None),
+                use_batch_api=args.batch_api,
+                stream_llm=args.stream,
+                force_llm=args.force_llm,
+                cache_dir=Path(args.cache_dir) if args.cache_dir else None,
+                max_concurrency=max(1, args.max_concurrency),
             )
             logger.info(f"Full conversion completed: {args.input_pdf} -> {args.output_epub}")
             return 0
@@ -43,6 +43,7 @@ class AzureStorageConfig:
     max_file_size_bytes: int
     log_cleanup: bool
     debug: bool
+    upload_concurrency: int = 4
 
 
 @dataclass(frozen=True)
@@ -148,6 +149,7 @@ class AppConfig:
             max_file_size_bytes=cfg.max_file_size_bytes,
             log_cleanup=cfg.log_cleanup,
             debug=cfg.debug,
+            upload_concurrency=cfg.upload_concurrency,
         )
 
         # Translator (provider + Azure Translator settings; env can override endpoint/region/key)
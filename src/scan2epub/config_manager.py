@@ -17,7 +17,8 @@ class ConfigManager:
         'Storage': {
             'max_file_size_mb': '256',
             'blob_container_name': 'scan2epub-temp',
-            'sas_token_expiry_hours': '1'
+            'sas_token_expiry_hours': '1',
+            'upload_concurrency': '4'
         },
         'Processing': {
             'debug': 'false',
@@ -99,6 +100,9 @@ blob_container_name = scan2epub-temp
 # After this time, the URLs will expire and files cannot be accessed
 sas_token_expiry_hours = 1
 
+# Number of parallel connections used to upload large PDFs (8 MB and up) in blocks
+upload_concurrency = 4
+
 [Processing]
 # Enable debug output for troubleshooting
 # Set to true to see detailed processing information
@@ -185,6 +189,11 @@ skip_preflight = false
     def sas_token_expiry_hours(self) -> int:
         """Get SAS token expiry in hours"""
         return self.getint('Storage', 'sas_token_expiry_hours', 1)
+
+    @property
+    def upload_concurrency(self) -> int:
+        """Get number of parallel block uploads for local PDFs"""
+        return max(1, self.getint('Storage', 'upload_concurrency', 4))
     
     @property
     def debug(self) -> bool:
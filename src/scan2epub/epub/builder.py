@@ -1,7 +1,20 @@
 from ebooklib import epub
-import re
 from typing import List, Dict, Any
 
+from scan2epub.epub.writer import write_epub_file
+
+
+class _SlugTable(dict):
+    """str.translate table deleting everything outside \\w (same set as re's Unicode \\w), filled lazily."""
+    def __missing__(self, codepoint: int):
+        value = codepoint if (chr(codepoint).isalnum() or codepoint == 0x5F) else None
+        self[codepoint] = value
+        return value
+
+
+_SLUG_TABLE = _SlugTable()
+
+
 class EPUBBuilder:
     """
     Builds an EPUB file from structured text content.
@@ -23,31 +36,31 @@ class EPUBBuilder:
         """Adds a chapter to the EPUB book."""
         if not file_name:
             # Create a simple file name from the title
-            file_name = re.sub(r'[^\w]', '', title).lower() + '.xhtml'
+            file_name = title.translate(_SLUG_TABLE).lower() + '.xhtml'
             if not file_name:  # Fallback if title is empty or only special chars
                 file_name = f'chapter_{len(self.chapters) + 1}.xhtml'
 
         chapter = epub.EpubHtml(title=title, file_name=file_name, lang=self.language)
         
         # Basic HTML wrapping for the content
-        html_content = f"""<?xml version='1.0' encoding='utf-8'?>
+        parts = [f"""<?xml version='1.0' encoding='utf-8'?>
 <html xmlns="http://www.w3.org/1999/xhtml">
 <head><title>{title}</title></head>
 <body>
-"""
+"""]
         # Split content into paragraphs and add them
         paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
         for paragraph in paragraphs:
             # Simple heuristic for headings vs paragraphs
             if len(paragraph) < 100 and not paragraph.endswith('.'):
-                html_content += f"<h2>{paragraph}</h2>\n"
+                parts.append(f"<h2>{paragraph}</h2>\n")
             else:
-                html_content += f"<p>{paragraph}</p>\n"
+                parts.append(f"<p>{paragraph}</p>\n")
         
-        html_content += """</body>
-</html>"""
+        parts.append("""</body>
+</html>""")
         
-        chapter.content = html_content.encode('utf-8')
+        chapter.content = "".join(parts).encode('utf-8')
         self.book.add_item(chapter)
         self.chapters.append(chapter)
 
@@ -62,5 +75,5 @@ class EPUBBuilder:
         self.book.add_item(epub.EpubNcx())
         self.book.add_item(epub.EpubNav())
 
-        epub.write_epub(output_path, self.book, {})
+        write_epub_file(output_path, self.book)
         print(f"EPUB file saved to: {output_path}")
@@ -1,26 +1,63 @@
+from __future__ import annotations
+
+import hashlib
+import importlib.util
 import logging
 import os
+import random
 import re
 import json
 import time
-import zipfile
 import tempfile
 import shutil
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional, Callable, Any
+from typing import TYPE_CHECKING, List, Dict, Tuple, Optional, Callable, Any, Iterator, MutableMapping, Union
 from dataclasses import dataclass
+from xml.sax.saxutils import escape as xml_escape
 
-import openai
-from bs4 import BeautifulSoup
 from ebooklib import epub
+from lxml import etree
 
 from scan2epub.utils.errors import LLMError, EPUBError
+from scan2epub.utils.io import clone_file, json_line, write_json
 from scan2epub.config import AzureOpenAIConfig
+from scan2epub.epub.writer import write_epub_file
+from scan2epub.epub.reader import read_epub_text
+from scan2epub.epub.llm_cache import LLMCache
+
+if TYPE_CHECKING:  # openai is imported lazily; it dominates module import time
+    import openai
 
 
 logger = logging.getLogger("scan2epub.cleaner")
 
+# Precompiled patterns for the per-chapter hot paths (analyze / chunk_text)
+_RE_EXCESS_NL = re.compile(r'\n\s*\n\s*\n')
+# Anchored on the literal '-' so the scanner can skip ahead instead of trying \w+ at every word start
+_RE_HYPHEN = re.compile(r'-(?<=\w-)\s*\n\s*\w+')
+_RE_SINGLE_LINE = re.compile(r'\n\s*\S[^\n]*\n\s*\n')
+_RE_PAGENUM = re.compile(r'\n\s*\d+\s*\n')
+# Common Hungarian abbreviations that end in '.' without ending the sentence
+_NON_TERMINAL_ABBREVIATIONS = (
+    "dr", "Dr", "stb", "pl", "Pl", "ill", "ún", "kb", "ld", "vö", "id", "ifj", "özv", "sz", "uo",
+    "St", "Kft", "Bt", "Zrt", "Nyrt", "Mr", "Mrs",
+)
+# Sentence boundary: whitespace after [.!?], but not after an abbreviation above, a single-letter
+# initial ("J. Kovács") or a number (Hungarian ordinals: "1848. március", "3. fejezet")
+_RE_SENT_SPLIT = re.compile(
+    r'(?<=[.!?])'
+    + ''.join(rf'(?<!\b{re.escape(a)}\.)' for a in _NON_TERMINAL_ABBREVIATIONS)
+    + r'(?<!\b\w\.)(?<!\d\.)\s+'
+)
+# Horizontal whitespace the LLM would only be asked to normalize (collapsed/dropped before chunking)
+_RE_TRAILING_SPACE = re.compile(r'[ \t]+(?=\n)')
+_RE_SPACE_RUN = re.compile(r'[ \t]{2,}')
+# Any of the analyze() patterns, for a single short-circuiting scan
+_RE_ANY_ARTIFACT = re.compile('|'.join(p.pattern for p in (_RE_EXCESS_NL, _RE_HYPHEN, _RE_SINGLE_LINE, _RE_PAGENUM)))
+
 
 @dataclass
 class CleanerRuntimeConfig:
@@ -30,6 +67,19 @@ class CleanerRuntimeConfig:
     max_tokens_response: int = 4000
     max_retries: int = 3
     retry_delay: int = 2
+    # Pack up to this many chunks into one request (capped by max_tokens_response)
+    marshal_batch_size: int = 4
+    # Stream LLM responses (live heartbeats while a chunk is generated)
+    stream_responses: bool = False
+    # Send every chunk to the LLM, even ones analyze() finds no artifacts in
+    force_llm: bool = False
+    # Submit all chunks of a book as one Batch API job instead of synchronous calls
+    use_batch_api: bool = False
+    batch_timeout_minutes: int = 60
+    # Persist cleaned chunks here and reuse them across runs (None: per-run memory cache only)
+    cache_dir: Optional[Path] = None
+    # LLM requests in flight at once; bounded by the deployment's RPM/TPM quota (429s are retried)
+    max_concurrency: int = 4
 
 
 # -------- Progress reporting --------
@@ -47,6 +97,7 @@ class ProgressReporter:
     def on_retry(self, idx: int, attempt: int, max_attempts: int, backoff_s: int, error: str) -> None: ...
     def on_error_giveup(self, idx: int, error: str) -> None: ...
     def on_summary(self, total: int, retries: int, tokens_in: Optional[int], tokens_out: Optional[int], elapsed_s: int) -> None: ...
+    def close(self) -> None: ...
 
 
 class ConsoleProgressReporter(ProgressReporter):
@@ -112,6 +163,8 @@ class ConsoleProgressReporter(ProgressReporter):
 class JsonFileProgressReporter(ProgressReporter):
     def __init__(self, status_file: Path):
         self.status_file = status_file
+        self._lock = threading.Lock()
+        self._fh = None  # unbuffered binary append handle (one write per line), opened on first event
         # truncate/create file
         try:
             self.status_file.parent.mkdir(parents=True, exist_ok=True)
@@ -121,11 +174,21 @@ class JsonFileProgressReporter(ProgressReporter):
 
     def _write(self, event: Dict[str, Any]) -> None:
         try:
-            with self.status_file.open("a", encoding="utf-8") as f:
-                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            line = json_line(event)
+            with self._lock:
+                if self._fh is None:
+                    self._fh = self.status_file.open("ab", buffering=0)
+                self._fh.write(line)
         except Exception:
             pass
 
+    def close(self) -> None:
+        """Release the file handle; a later event simply reopens it."""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
     def on_stage(self, stage: str, extras: Optional[Dict[str, Any]] = None) -> None:
         ev = {"t": time.time(), "event": "stage", "stage": stage}
         if extras:
@@ -163,22 +226,185 @@ class JsonFileProgressReporter(ProgressReporter):
         self._write({"t": time.time(), "event": "summary", "total": total, "retries": retries, "tokens_in": tokens_in, "tokens_out": tokens_out, "elapsed_s": elapsed_s})
 
 
+class CompositeReporter(ProgressReporter):
+    """Fans every event out to several reporters, in order."""
+    def __init__(self, reporters: List[ProgressReporter]):
+        self.reporters = reporters
+
+    def on_stage(self, stage: str, extras: Optional[Dict[str, Any]] = None) -> None:
+        for r in self.reporters:
+            r.on_stage(stage, extras)
+
+    def on_chunking_done(self, total_chunks: int) -> None:
+        for r in self.reporters:
+            r.on_chunking_done(total_chunks)
+
+    def on_chunk_start(self, idx: int, total: int) -> None:
+        for r in self.reporters:
+            r.on_chunk_start(idx, total)
+
+    def on_llm_submit(self, idx: int, total: int) -> None:
+        for r in self.reporters:
+            r.on_llm_submit(idx, total)
+
+    def on_llm_wait_start(self, idx: int, total: int) -> None:
+        for r in self.reporters:
+            r.on_llm_wait_start(idx, total)
+
+    def on_llm_wait_heartbeat(self, idx: int, total: int, elapsed_s: int) -> None:
+        for r in self.reporters:
+            r.on_llm_wait_heartbeat(idx, total, elapsed_s)
+
+    def on_llm_wait_end(self, idx: int, total: int, latency_s: float) -> None:
+        for r in self.reporters:
+            r.on_llm_wait_end(idx, total, latency_s)
+
+    def on_chunk_result(self, idx: int, total: int, tokens_in: Optional[int], tokens_out: Optional[int], latency_s: float) -> None:
+        for r in self.reporters:
+            r.on_chunk_result(idx, total, tokens_in, tokens_out, latency_s)
+
+    def on_retry(self, idx: int, attempt: int, max_attempts: int, backoff_s: int, error: str) -> None:
+        for r in self.reporters:
+            r.on_retry(idx, attempt, max_attempts, backoff_s, error)
+
+    def on_error_giveup(self, idx: int, error: str) -> None:
+        for r in self.reporters:
+            r.on_error_giveup(idx, error)
+
+    def on_summary(self, total: int, retries: int, tokens_in: Optional[int], tokens_out: Optional[int], elapsed_s: int) -> None:
+        for r in self.reporters:
+            r.on_summary(total, retries, tokens_in, tokens_out, elapsed_s)
+
+    def close(self) -> None:
+        for r in self.reporters:
+            r.close()
+
+
+class LLMDebugLog:
+    """Append-only JSONL log of LLM requests/responses (debug mode), one file instead of two per call.
+    The file is opened lazily and writes are serialized with a lock so workers can share it.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fh = None
+        self._system_prompt_ids: Dict[str, int] = {}
+
+    def write_request(self, record: Dict[str, Any], messages: List[Dict[str, str]]) -> None:
+        """Log a request, writing each distinct system prompt only once and referring to it by id afterwards."""
+        now = time.time()
+        with self._lock:
+            lines: List[bytes] = []
+            logged: List[Dict[str, Any]] = []
+            for message in messages:
+                if message["role"] != "system":
+                    logged.append(message)
+                    continue
+                prompt_id = self._system_prompt_ids.get(message["content"])
+                if prompt_id is None:
+                    prompt_id = self._system_prompt_ids[message["content"]] = len(self._system_prompt_ids)
+                    lines.append(json_line({"t": now, "direction": "system_prompt", "system_prompt_id": prompt_id, "content": message["content"]}))
+                logged.append({"role": "system", "system_prompt_id": prompt_id})
+            lines.append(json_line({"t": now, **record, "direction": "request", "messages": logged}))
+            self._append(b"".join(lines))
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json_line({"t": time.time(), **record})
+        with self._lock:
+            self._append(line)
+
+    def _append(self, data: bytes) -> None:
+        # Caller holds self._lock
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.path, "ab")
+        self._fh.write(data)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+
 # -------- Pure helpers (no class state) --------
 
+# Recovering XML parser mirroring BeautifulSoup's 'lxml-xml' text extraction (comments/PIs dropped,
+# undeclared entities skipped). Parser instances are not thread-safe; extraction runs on one thread.
+_XHTML_PARSER = etree.XMLParser(recover=True, resolve_entities=False, remove_comments=True, remove_pis=True, huge_tree=True)
+
+
+def html_to_text(raw: bytes) -> str:
+    """Pure function: all text content of an (X)HTML document, without building a BeautifulSoup tree."""
+    try:
+        root = etree.fromstring(raw, _XHTML_PARSER)
+    except etree.XMLSyntaxError:
+        return ""
+    if root is None:
+        return ""
+    return root.xpath("string()")
+
+
+# Package/navigation documents never hold book text: exact OPF/NCX names, or 'nav' anywhere (any case)
+_RE_NAV_FILE = re.compile(r'\A(?:toc\.ncx|content\.opf)\Z|(?i:nav)')
+
+
+def is_navigation_file(file_name: str) -> bool:
+    """Pure function: whether an EPUB item is navigation/package metadata rather than content."""
+    return _RE_NAV_FILE.search(file_name) is not None
+
+
+def read_dc_metadata(book: epub.EpubBook) -> Dict[str, str]:
+    """Pure function: the Dublin Core fields we carry over, one metadata lookup per field."""
+    def first(name: str, default: str) -> str:
+        values = book.get_metadata('DC', name)
+        return values[0][0] if values else default
+
+    return {
+        'title': first('title', 'Unknown'),
+        'author': first('creator', 'Unknown'),
+        'language': first('language', 'hu'),
+        'identifier': first('identifier', 'unknown'),
+    }
+
+
+def _count_hyphenated(text: str) -> int:
+    r"""Count r'\w+-\s*\n\s*\w+' matches using the faster hyphen-anchored pattern.
+
+    The original pattern's trailing \w+ consumes the whole next word, so a hyphen directly after a
+    counted match cannot start a match of its own; replicate that by skipping such hits.
+    """
+    count = 0
+    prev_end = -1
+    for m in _RE_HYPHEN.finditer(text):
+        if m.start() != prev_end:
+            count += 1
+            prev_end = m.end()
+        else:
+            prev_end = -1
+    return count
+
+
 def analyze(text: str) -> Dict[str, int]:
     """Pure function: analyze text for common OCR artifacts."""
     return {
-        'excessive_line_breaks': len(re.findall(r'\n\s*\n\s*\n', text)),
-        'hyphenated_words': len(re.findall(r'\w+-\s*\n\s*\w+', text)),
-        'single_line_paragraphs': len(re.findall(r'\n\s*\S[^\n]*\n\s*\n', text)),
-        'page_numbers': len(re.findall(r'\n\s*\d+\s*\n', text)),
-        'short_lines': len([line for line in text.split('\n') if 0 < len(line.strip()) < 30]),
+        'excessive_line_breaks': sum(1 for _ in _RE_EXCESS_NL.finditer(text)),
+        'hyphenated_words': _count_hyphenated(text),
+        'single_line_paragraphs': sum(1 for _ in _RE_SINGLE_LINE.finditer(text)),
+        'page_numbers': sum(1 for _ in _RE_PAGENUM.finditer(text)),
+        'short_lines': sum(1 for line in text.split('\n') if 0 < len(line.strip()) < 30),
     }
 
 
-def create_cleanup_prompt() -> str:
-    """Create the prompt for LLM-based OCR cleanup"""
-    return """Te egy magyar nyelvű szöveg OCR hibáinak javítására specializálódott asszisztens vagy. 
+def has_artifacts(text: str) -> bool:
+    """Pure function: same as any(analyze(text).values()), but stops at the first hit in one pass."""
+    return _RE_ANY_ARTIFACT.search(text) is not None or any(0 < len(line.strip()) < 30 for line in text.split('\n'))
+
+
+# Long, stable system prefix: Azure prompt caching only applies to prompts sharing their first 1024+ tokens,
+# and the chunk itself always goes in the user message so the prefix stays byte-identical across requests.
+# Single-chunk and marshaled prompts both start with these rules and differ only in their closing part.
+_CLEANUP_RULES = """Te egy magyar nyelvű szöveg OCR hibáinak javítására specializálódott asszisztens vagy. 
 
 FELADATOD:
 1. Távolítsd el az OCR által okozott felesleges sortöréseket és oldalelválasztásokat
@@ -194,50 +420,294 @@ FONTOS SZABÁLYOK:
 - Őrizd meg a fejezetek és bekezdések logikus felépítését
 - Ha bizonytalan vagy, inkább hagyd változatlanul
 
-Kérlek, tisztítsd meg a következő szöveget:
+RÉSZLETES ÚTMUTATÓ:
+
+Elválasztás:
+- A sor végén kötőjellel elválasztott szót egyesítsd, a kötőjelet és a sortörést töröld (pl. "meg-
+érkezett" → "megérkezett", "kapu-
+jában" → "kapujában").
+- Ha a kötőjel a szó része, tartsd meg és csak a sortörést töröld (pl. "Kelet-
+Európa" → "Kelet-Európa", "e-
+mail" → "e-mail", "Budapest–Bécs" változatlan).
+- Nagybetűs második tag, tulajdonnév vagy szám után álló kötőjel általában a szó része.
+
+Sortörések és bekezdések:
+- Egy bekezdésen belül a sortöréseket egyetlen szóközzel helyettesítsd.
+- A bekezdéseket pontosan egy üres sor válassza el egymástól.
+- Ha egy bekezdés oldalhatáron folytatódik (a sor nem mondatvégi írásjellel végződik, a következő kisbetűvel kezdődik), egyesítsd a két részt.
+- A párbeszédek gondolatjellel (–) kezdődő sorai külön bekezdések maradjanak.
+- A fejezetcímek és alcímek külön sorban, külön bekezdésként maradjanak, változatlan szöveggel.
+- Verseknél, idézett leveleknél és felsorolásoknál őrizd meg az eredeti sorokat.
+
+Oldalszámok:
+- Töröld az önálló sorban álló oldalszámokat (pl. "17", "- 17 -", "[17]").
+- A szövegben szereplő számokat, évszámokat és dátumokat soha ne töröld.
+- Az önálló sorban álló címeket soha ne töröld, akkor sem, ha a szövegben többször előfordulnak.
+
+Karakterhibák:
+- Az ékezetes betűk tipikus OCR-tévesztéseit javítsd: "ô", "õ" → "ő"; "û", "ũ" → "ű"; "a'", "à" → "á".
+- Javítsd a szó közepén álló nyilvánvaló tévesztéseket (pl. "l" és "I", "0" és "O", "rn" és "m"), de csak akkor, ha a helyes szó egyértelmű.
+- Töröld a szóközt az írásjelek (. , ; : ! ?) elől, és tegyél szóközt mögéjük, ha hiányzik.
+- A magyar idézőjeleket („…”, »…«) és a gondolatjeleket ne cseréld más formára.
+- Ritka, régies vagy idegen szavakat, neveket és tájnyelvi alakokat ne „javíts ki”.
+
+Lábjegyzetek, jegyzetek, különleges elemek:
+- A lábjegyzetszámokat és a csillagokat (pl. "¹", "*") hagyd a helyükön; a lábjegyzet szövegét ne olvaszd bele a folyó szövegbe, hanem tartsd meg külön bekezdésként.
+- A szövegbe ékelt, oldal alján maradt lábjegyzetet ne töröld, csak válaszd el üres sorral.
+- Táblázatok, tartalomjegyzékek és névmutatók sorait ne egyesítsd folyó szöveggé; ott csak a karakterhibákat javítsd.
+- A kiemelésre utaló ritkított írást (pl. "s z a b a d s á g") hagyd változatlanul, mert a kiemelés a szöveg része.
+- A képaláírásokat és ábrafeliratokat önálló bekezdésként hagyd meg.
+- Ha a szövegrészlet mondat közepén kezdődik vagy ér véget, ne egészítsd ki; hagyd a csonka mondatot úgy, ahogy van.
+- Ha a bemenet már hibátlan, add vissza változatlanul.
+
+Kimenet:
+- Csak a megtisztított szöveget add vissza, magyarázat, bevezető vagy megjegyzés nélkül.
+- Ne használj Markdown formázást, ne tegyél a szöveg köré idézőjelet vagy kódblokkot.
+- Ne foglald össze, ne fordítsd le és ne egészítsd ki a szöveget; a kimenet hossza közel azonos legyen a bemenetével.
+- A bekezdések sorrendjét ne változtasd meg, és ne adj hozzá új címet, fejlécet vagy záró megjegyzést.
+- Az ékezetes betűket soha ne cseréld ékezet nélküliekre, és ne írd át a szöveget más helyesírási változatra.
+
+PÉLDÁK:
+
+Bemenet:
+A vo-
+nat lassan gördült be az állomás-
+ra, a pe-
+ronon alig állt valaki.
+
+42
+
+Kelet-
+Európa felől hideg szél fújt.
+Kimenet:
+A vonat lassan gördült be az állomásra, a peronon alig állt valaki.
+
+Kelet-Európa felől hideg szél fújt.
+
+Bemenet:
+– Hová mégy? – kérdezte az any-
+ja.
+– A kertbe , csak egy percre .
+Kimenet:
+– Hová mégy? – kérdezte az anyja.
+
+– A kertbe, csak egy percre.
+
+Bemenet:
+A KÉK MADÁR
+
+A kert vé-
+gében, a diófa alatt már senki sem vár-
+ta ôt. A szél még sosem fújt ilyen hidegen .
+Kimenet:
+A KÉK MADÁR
+
+A kert végében, a diófa alatt már senki sem várta őt. A szél még sosem fújt ilyen hidegen.
+
+Bemenet:
+Lassan száll a köd a réten,
+csend ül a kert közepén.
+Kimenet:
+Lassan száll a köd a réten,
+csend ül a kert közepén.
 
 """
+_CLEANUP_PROMPT = _CLEANUP_RULES + """Kérlek, tisztítsd meg a következő szöveget:
 
+"""
+
+
+def create_cleanup_prompt() -> str:
+    """Create the prompt for LLM-based OCR cleanup"""
+    return _CLEANUP_PROMPT
+
+
+_TOKEN_ENCODING: Any = None  # tiktoken Encoding once resolved; False when unavailable
+
+
+def _token_encoding() -> Optional[Any]:
+    """Lazily load the GPT-4o/4.1 BPE (o200k_base) once per process; None if tiktoken is unavailable."""
+    global _TOKEN_ENCODING
+    if _TOKEN_ENCODING is None:
+        try:
+            import tiktoken
+            _TOKEN_ENCODING = tiktoken.get_encoding("o200k_base")
+        except Exception:  # not installed, or BPE file not downloadable (offline)
+            _TOKEN_ENCODING = False
+    return _TOKEN_ENCODING or None
 
-def chunk_text(text: str, max_tokens_per_chunk: int) -> List[str]:
-    """Pure function: split text into chunks suitable for LLM processing.
-    Rough estimation: 1 token ≈ 2 chars for conservative chunking here.
-    """
-    max_chars = max_tokens_per_chunk * 2
 
-    chunks: List[str] = []
-    current_chunk = ""
+def count_tokens(text: str) -> int:
+    """Real token count when tiktoken is installed, else the conservative 1 token ≈ 2 chars estimate."""
+    encoding = _token_encoding()
+    if encoding is None:
+        return (len(text) + 1) // 2
+    return len(encoding.encode_ordinary(text))
+
+
+def iter_chunks(text: str, max_tokens_per_chunk: int) -> Iterator[str]:
+    """Pure generator: yield chunks suitable for LLM processing as soon as each is finalized.
+    Sizes are measured in real tokens when tiktoken is installed (Hungarian runs well above
+    2 chars/token, so chunks fill the budget); otherwise 1 token ≈ 2 chars, conservatively.
+    """
+    encoding = _token_encoding()
+    if encoding is None:
+        measure: Callable[[str], int] = len
+        limit = max_tokens_per_chunk * 2
+    else:
+        def measure(piece: str) -> int:
+            return len(encoding.encode_ordinary(piece))
+        limit = max_tokens_per_chunk
+    # Common case (short chapters, front matter): the whole text fits, skip the paragraph walk
+    if len(text) <= limit and (encoding is None or measure(text) <= limit):
+        if text.replace("\n\n", ""):
+            yield text.strip()
+        return
+
+    sentence_sep_cost = measure(" ")
+    paragraph_sep_cost = measure("\n\n")
+
+    # Accumulate pieces (each carrying its leading separator) and join only on flush
+    parts: List[str] = []
+    current_len = 0
 
     # Split by paragraphs first
     paragraphs = text.split("\n\n")
 
     for paragraph in paragraphs:
+        paragraph_cost = measure(paragraph)
         # If adding this paragraph would exceed the limit
-        if len(current_chunk) + len(paragraph) > max_chars:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-                current_chunk = paragraph
+        if current_len + paragraph_cost > limit:
+            if current_len:
+                yield "".join(parts).strip()
+                parts = [paragraph]
+                current_len = paragraph_cost
             else:
                 # Paragraph is too long, split by sentences
-                sentences = re.split(r'(?<=[.!?])\s+', paragraph)
+                sentences = _RE_SENT_SPLIT.split(paragraph)
                 for sentence in sentences:
-                    if len(current_chunk) + len(sentence) > max_chars:
-                        if current_chunk:
-                            chunks.append(current_chunk.strip())
-                            current_chunk = sentence
+                    sentence_cost = measure(sentence)
+                    if current_len + sentence_cost > limit:
+                        if current_len:
+                            yield "".join(parts).strip()
+                            parts = [sentence]
+                            current_len = sentence_cost
                         else:
-                            # Even single sentence is too long, force split
-                            chunks.append(sentence[:max_chars])
-                            current_chunk = sentence[max_chars:]
+                            # Even single sentence is too long, force split (proportionally by size)
+                            cut = max(1, len(sentence) * limit // sentence_cost)
+                            yield sentence[:cut]
+                            parts = [sentence[cut:]]
+                            current_len = measure(parts[0])
+                    elif current_len:
+                        parts.append(" " + sentence)
+                        current_len += sentence_sep_cost + sentence_cost
                     else:
-                        current_chunk += " " + sentence if current_chunk else sentence
+                        parts.append(sentence)
+                        current_len += sentence_cost
+        elif current_len:
+            parts.append("\n\n" + paragraph)
+            current_len += paragraph_sep_cost + paragraph_cost
         else:
-            current_chunk += "\n\n" + paragraph if current_chunk else paragraph
+            parts.append(paragraph)
+            current_len += paragraph_cost
+
+    if current_len:
+        yield "".join(parts).strip()
+
+
+def normalize_whitespace(text: str) -> str:
+    """Pure function: drop trailing spaces and collapse runs of spaces/tabs to one space.
+
+    Mechanical fixes done locally save input tokens. Newlines are left alone, so paragraph and
+    line structure (and with it hyphenation and page-number detection) is unchanged.
+    """
+    return _RE_SPACE_RUN.sub(" ", _RE_TRAILING_SPACE.sub("", text))
+
+
+def chunk_text(text: str, max_tokens_per_chunk: int) -> List[str]:
+    """Pure function: split text into chunks suitable for LLM processing (see iter_chunks)."""
+    return list(iter_chunks(text, max_tokens_per_chunk))
 
-    if current_chunk:
-        chunks.append(current_chunk.strip())
 
-    return chunks
+def chunk_key(chunk: str) -> bytes:
+    """Content address for a chunk (BLAKE2b-128; ample for per-run dedup, C-speed via hashlib)."""
+    return hashlib.blake2b(chunk.encode("utf-8"), digest_size=16).digest()
+
+
+MARSHAL_INSTRUCTION = """TÖBB SZÖVEGRÉSZLET:
+A bemenet több, számozott szövegrészletből áll (<<< és >>> között). Minden részletet külön tisztíts meg
+a fenti szabályok szerint. A Kimenet pontban leírt formátum helyett a választ kizárólag egyetlen JSON tömbként
+add vissza, kódblokk és magyarázat nélkül: részletenként egy szöveg (string), a bemenet sorrendjében.
+
+Kérlek, tisztítsd meg a következő szövegrészleteket:
+
+"""
+_MARSHAL_PROMPT = _CLEANUP_RULES + MARSHAL_INSTRUCTION
+
+
+def marshal_groups(chunks: List[str], batch_size: int, max_tokens_response: int) -> List[List[int]]:
+    """Pure function: group consecutive chunk indexes so each group's estimated output fits max_tokens_response.
+    Sizes come from count_tokens(); oversized chunks end up alone in a group.
+    """
+    groups: List[List[int]] = []
+    current: List[int] = []
+    budget = 0
+    for i, chunk in enumerate(chunks):
+        estimate = count_tokens(chunk)
+        if current and (len(current) >= batch_size or budget + estimate > max_tokens_response):
+            groups.append(current)
+            current = []
+            budget = 0
+        current.append(i)
+        budget += estimate
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _parse_marshaled(content: str, expected: int) -> Optional[List[str]]:
+    """Parse a marshaled response (JSON array of strings); None if it does not match the request."""
+    text = content.strip()
+    # Tolerate a Markdown code fence around the array
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("["):] if "[" in text else text
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(parsed, list) or len(parsed) != expected or not all(isinstance(p, str) for p in parsed):
+        return None
+    return [p.strip() for p in parsed]
+
+
+def predict_output_tokens(text: str, cap: int, floor: int = 512) -> int:
+    """max_tokens for a cleanup request: ~15% above the input size, within [floor, cap]."""
+    return min(cap, max(floor, int(count_tokens(text) * 1.15)))
+
+
+def retryable_errors() -> Tuple[type, ...]:
+    """Transient failures worth retrying (APITimeoutError is a subclass of APIConnectionError)."""
+    import openai
+    return (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+
+def retry_backoff_s(error: Exception, attempt: int, base_delay: float, max_delay: float = 30.0) -> float:
+    """Seconds to wait before the next attempt: server Retry-After if present, else exponential backoff with jitter.
+
+    Jitter keeps chunks that hit a 429 together from retrying in lockstep.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return min(float(headers["retry-after-ms"]) / 1000.0, max_delay)
+        if headers.get("retry-after"):
+            return min(float(headers["retry-after"]), max_delay)
+    except ValueError:
+        pass  # HTTP-date form; fall through to computed backoff
+    delay = min(max_delay, base_delay * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
 
 
 def clean_chunks(
@@ -249,126 +719,398 @@ def clean_chunks(
     debug_mode: bool = False,
     debug_dir: Optional[Path] = None,
     reporter: Optional[ProgressReporter] = None,
+    marshal_batch_size: int = 1,
+    cache: Optional[MutableMapping[bytes, str]] = None,
+    max_retries: int = 3,
+    retry_delay: float = 2,
+    stream: bool = False,
+    force_llm: bool = False,
+    max_concurrency: int = 1,
 ) -> List[str]:
-    """Helper handling retries, progress, and debug artifacts writing."""
-    cleaned_chunks: List[str] = []
+    """Helper handling retries, progress, and debug artifacts writing.
+
+    Chunks for which analyze() finds no artifact at all are returned unchanged without an LLM
+    call, unless force_llm is set.
+
+    Only transient errors (rate limits, timeouts, connection and 5xx errors) are retried, with
+    exponential backoff plus jitter starting at retry_delay, or the server's Retry-After when given.
+
+    With stream=True responses are consumed incrementally, so progress heartbeats reflect real
+    generation instead of a silent wait (token usage is then usually unavailable).
+
+    When a cache mapping is given (see chunk_key; a dict, or an LLMCache to persist across runs),
+    chunks already cleaned earlier, and repeats within this call, are served from it instead of
+    being sent to the LLM again. Each result is stored as soon as its request succeeds, so an
+    interrupted run loses nothing already cleaned.
+
+    With marshal_batch_size > 1, consecutive chunks are packed into one numbered request and the
+    model returns a JSON array, amortizing RTT and system prompt tokens across the group. The
+    speedup is sub-linear: output tokens still dominate latency, and a malformed reply costs a
+    per-chunk retry of the whole group, so small batch sizes (2-8) are the sweet spot.
+
+    With max_concurrency > 1, requests (single chunks or marshaled groups) are dispatched from a
+    thread pool of that size. Each worker writes only its own indices, so output order is kept.
+    """
     total = len(chunks)
+    cleaned_chunks: List[str] = list(chunks)
     if reporter:
         reporter.on_stage("Preparing content")
         reporter.on_chunking_done(total)
 
     logger.info(f"Processing {total} text chunks...")
-    max_retries = 3
-    retry_delay = 2
     total_tokens_in = 0
     total_tokens_out = 0
     total_retries = 0
     start_ts = time.time()
-
-    for i, chunk in enumerate(chunks, start=1):
+    retryable = retryable_errors()
+    stats_lock = threading.Lock()
+    debug_log = LLMDebugLog(debug_dir / "llm_requests_responses" / "llm_log.jsonl") if (debug_mode and debug_dir) else None
+
+    def _complete(i: int, messages: List[Dict[str, str]], budget: int, wait_start: float) -> Tuple[str, Optional[str], Any, Any]:
+        """One chat completion call; returns (content, finish_reason, usage, response or None when streamed)."""
+        if not stream:
+            response = client.chat.completions.create(
+                model=deployment,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=budget,
+            )
+            choice = response.choices[0]
+            return choice.message.content, getattr(choice, "finish_reason", None), getattr(response, "usage", None), response
+
+        # Tokens arrive incrementally, which gives real heartbeats during long generations
+        parts: List[str] = []
+        finish_reason = None
+        usage = None
+        last_beat = wait_start
+        for event in client.chat.completions.create(
+            model=deployment,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=budget,
+            stream=True,
+        ):
+            # Azure sends content-filter-only events with no choices
+            if event.choices:
+                if event.choices[0].delta.content:
+                    parts.append(event.choices[0].delta.content)
+                finish_reason = event.choices[0].finish_reason or finish_reason
+            usage = getattr(event, "usage", None) or usage
+            now = time.time()
+            if reporter and now - last_beat >= 5:
+                last_beat = now
+                reporter.on_llm_wait_heartbeat(i, total, int(now - wait_start))
+        return "".join(parts), finish_reason, usage, None
+
+    def _request(i: int, label: str, messages: List[Dict[str, str]]) -> Tuple[Optional[str], Optional[str]]:
+        """Run one chat completion with retries; returns (content, last_error)."""
+        nonlocal total_tokens_in, total_tokens_out, total_retries
         if reporter:
             reporter.on_chunk_start(i, total)
             reporter.on_llm_submit(i, total)
 
+        # Cleanup output is about as long as its input; a tight max_tokens lets the service schedule more requests
+        output_budget = predict_output_tokens(messages[-1]["content"], max_tokens_response)
         last_error: Optional[str] = None
-        t0 = time.time()
         for attempt in range(max_retries):
             if attempt > 0:
-                total_retries += 1
+                with stats_lock:
+                    total_retries += 1
             try:
-                messages = [
-                    {"role": "system", "content": create_cleanup_prompt()},
-                    {"role": "user", "content": chunk},
-                ]
-
                 wait_start = time.time()
                 if reporter:
                     reporter.on_llm_wait_start(i, total)
 
-                # We cannot truly stream Azure responses with this SDK call; emulate heartbeat while waiting
-                # by polling elapsed time around the synchronous call.
-                # Start the request
-                response = client.chat.completions.create(
-                    model=deployment,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens_response,
-                )
+                budget = output_budget
+                raw_content, finish_reason, usage, response = _complete(i, messages, budget, wait_start)
+                if finish_reason == "length" and budget < max_tokens_response:
+                    # Prediction was too tight and the output got cut off: retry once with twice the budget
+                    budget = min(max_tokens_response, budget * 2)
+                    logger.info(f"LLM output for {label} truncated, retrying with max_tokens={budget}")
+                    raw_content, finish_reason, usage, response = _complete(i, messages, budget, wait_start)
                 # LLM returned; report end
                 latency = time.time() - wait_start
                 if reporter:
                     reporter.on_llm_wait_end(i, total, latency)
 
-                cleaned_text = response.choices[0].message.content.strip()
-                cleaned_chunks.append(cleaned_text)
+                content = raw_content.strip()
 
                 # Token accounting if available
                 tokens_in = None
                 tokens_out = None
                 try:
-                    usage = getattr(response, "usage", None)
                     if usage:
                         tokens_in = getattr(usage, "prompt_tokens", None) or getattr(usage, "input_tokens", None)
                         tokens_out = getattr(usage, "completion_tokens", None) or getattr(usage, "output_tokens", None)
-                        if isinstance(tokens_in, int):
-                            total_tokens_in += tokens_in
-                        if isinstance(tokens_out, int):
-                            total_tokens_out += tokens_out
+                        with stats_lock:
+                            if isinstance(tokens_in, int):
+                                total_tokens_in += tokens_in
+                            if isinstance(tokens_out, int):
+                                total_tokens_out += tokens_out
                 except Exception:
                     pass
 
                 if reporter:
                     reporter.on_chunk_result(i, total, tokens_in, tokens_out, latency)
 
-                if debug_mode and debug_dir:
-                    llm_debug_dir = debug_dir / "llm_requests_responses"
-                    llm_debug_dir.mkdir(parents=True, exist_ok=True)
-                    request_file = llm_debug_dir / f"llm_chunk_{i}_request_attempt_{attempt+1}.json"
-                    response_file = llm_debug_dir / f"llm_chunk_{i}_response_attempt_{attempt+1}.json"
-                    with open(request_file, "w", encoding="utf-8") as f:
-                        json.dump(
-                            {
-                                "messages": messages,
-                                "temperature": temperature,
-                                "max_tokens": max_tokens_response,
-                            },
-                            f,
-                            ensure_ascii=False,
-                            indent=2,
-                        )
-                    with open(response_file, "w", encoding="utf-8") as f:
-                        try:
-                            f.write(response.model_dump_json(indent=2))
-                        except Exception:
-                            # Fallback serialization
-                            f.write(json.dumps(response.__dict__, default=str, indent=2))
-                    logger.debug(f"LLM request/response for chunk {i} saved to {llm_debug_dir}")
-                break
-            except Exception as e:
+                if debug_log:
+                    debug_log.write_request({
+                        "label": label,
+                        "attempt": attempt + 1,
+                        "temperature": temperature,
+                        "max_tokens": budget,
+                    }, messages)
+                    # Only the parts worth inspecting, not a full model_dump() of every response
+                    try:
+                        usage_payload = usage.model_dump(mode="json") if usage is not None else None
+                    except Exception:
+                        usage_payload = str(usage)
+                    debug_log.write({
+                        "label": label,
+                        "attempt": attempt + 1,
+                        "direction": "response",
+                        "response": {
+                            "id": getattr(response, "id", None),
+                            "streamed": response is None,
+                            "finish_reason": finish_reason,
+                            "content": raw_content,
+                            "usage": usage_payload,
+                        },
+                    })
+                return content, None
+            except retryable as e:
                 last_error = str(e)
                 if attempt < max_retries - 1:
+                    backoff = retry_backoff_s(e, attempt, retry_delay)
                     if reporter:
-                        reporter.on_retry(i, attempt + 1, max_retries, retry_delay, last_error)
-                    time.sleep(retry_delay)
-                else:
-                    logger.warning(f"Failed to process chunk {i}, using original text: {last_error}")
-                    if reporter:
-                        reporter.on_error_giveup(i, last_error or "unknown error")
-                    cleaned_chunks.append(chunk)
-
-        # Heartbeat while waiting was handled around the call; for very long waits, we log periodic messages
-        # Note: since the call is synchronous, we emulate heartbeats by printing periodic 'Still waiting' logs
-        # in on_llm_wait_heartbeat from the call site above (not feasible without threads). Kept simple.
-
+                        reporter.on_retry(i, attempt + 1, max_retries, round(backoff), last_error)
+                    time.sleep(backoff)
+            except Exception as e:
+                # Bad requests, content filtering, malformed responses: retrying will not help
+                return None, str(e)
+        return None, last_error
+
+    # Chunks without any detectable OCR artifact are passed through unchanged
+    if force_llm:
+        candidates = list(range(total))
+    else:
+        candidates = [idx for idx, chunk in enumerate(chunks) if has_artifacts(chunk)]
+        if len(candidates) < total:
+            logger.info(f"{total - len(candidates)} of {total} chunks show no OCR artifacts, keeping them as-is")
+
+    # Only dispatch the first occurrence of chunks not cleaned before
+    keys: Dict[int, bytes] = {idx: chunk_key(chunks[idx]) for idx in candidates} if cache is not None else {}
+    pending: List[int] = []
+    if cache is not None:
+        first_seen: Dict[bytes, int] = {}
+        for idx in candidates:
+            key = keys[idx]
+            if key in cache:
+                cleaned_chunks[idx] = cache[key]
+            elif key not in first_seen:
+                first_seen[key] = idx
+                pending.append(idx)
+        if len(pending) < len(candidates):
+            logger.info(f"{len(candidates) - len(pending)} of {total} chunks served from cache or deduplicated")
+            if reporter:
+                reporter.on_stage("Deduplicated", {"unique": len(pending), "candidates": len(candidates), "total": total})
+    else:
+        pending = candidates
+
+    def _store(idx: int) -> None:
+        # Saved as soon as it is paid for, so an interrupted run keeps everything cleaned so far
+        if cache is not None:
+            cache[keys[idx]] = cleaned_chunks[idx]
+
+    def _clean_single(idx: int) -> None:
+        i = idx + 1
+        content, error = _request(i, f"chunk_{i}", [
+            {"role": "system", "content": _CLEANUP_PROMPT},
+            {"role": "user", "content": chunks[idx]},
+        ])
+        if content is None:
+            logger.warning(f"Failed to process chunk {i}, using original text: {error}")
+            if reporter:
+                reporter.on_error_giveup(i, error or "unknown error")
+            return
+        cleaned_chunks[idx] = content
+        _store(idx)
+
+    def _clean_group(group: List[int]) -> None:
+        if len(group) == 1:
+            _clean_single(group[0])
+            return
+
+        first, last = group[0] + 1, group[-1] + 1
+        user_content = "\n".join(f"{n}. <<<{chunks[idx]}>>>" for n, idx in enumerate(group, start=1))
+        content, _ = _request(first, f"chunks_{first}-{last}", [
+            {"role": "system", "content": _MARSHAL_PROMPT},
+            {"role": "user", "content": user_content},
+        ])
+        parsed = _parse_marshaled(content, len(group)) if content is not None else None
+        if parsed is None:
+            # Malformed or failed group reply: clean its chunks one by one instead
+            logger.warning(f"Marshaled response for chunks {first}-{last} unusable, retrying per chunk")
+            for idx in group:
+                _clean_single(idx)
+            return
+        for idx, text in zip(group, parsed):
+            cleaned_chunks[idx] = text
+            _store(idx)
+
+    groups = [[pending[j] for j in g] for g in marshal_groups([chunks[idx] for idx in pending], max(1, marshal_batch_size), max_tokens_response)]
+    if max_concurrency > 1 and len(groups) > 1:
+        # LLM calls are I/O-bound: overlap their latency instead of summing it
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(groups))) as pool:
+            list(pool.map(_clean_group, groups))
+    else:
+        for group in groups:
+            _clean_group(group)
+
+    if cache is not None:
+        # Repeats of a chunk cleaned in this call take its result
+        for idx, key in keys.items():
+            if key in cache:
+                cleaned_chunks[idx] = cache[key]
+
+    if debug_log:
+        debug_log.close()
     elapsed = int(time.time() - start_ts)
     if reporter:
         reporter.on_summary(total, total_retries, total_tokens_in or None, total_tokens_out or None, elapsed)
     return cleaned_chunks
 
 
+# Azure OpenAI batch jobs target the deployment-relative chat completions route
+BATCH_ENDPOINT = "/chat/completions"
+_BATCH_TERMINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+def clean_chunks_batch(
+    requests: List[Tuple[str, str]],
+    client: openai.AzureOpenAI,
+    deployment: str,
+    temperature: float,
+    max_tokens_response: int,
+    timeout_s: float,
+    debug_mode: bool = False,
+    debug_dir: Optional[Path] = None,
+    reporter: Optional[ProgressReporter] = None,
+) -> Optional[Dict[str, str]]:
+    """Submit (custom_id, chunk) pairs as a single Batch API job.
+
+    Returns cleaned text keyed by custom_id. Ids missing from the result had a per-request
+    failure; None means the whole job failed or did not finish within timeout_s. Callers
+    are expected to fall back to synchronous clean_chunks() for anything not returned.
+    """
+    if not requests:
+        return {}
+
+    lines = []
+    for custom_id, chunk in requests:
+        lines.append(json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": {
+                "model": deployment,
+                "messages": [
+                    {"role": "system", "content": _CLEANUP_PROMPT},
+                    {"role": "user", "content": chunk},
+                ],
+                "temperature": temperature,
+                # Same per-request output budget as synchronous cleanup
+                "max_tokens": predict_output_tokens(chunk, max_tokens_response),
+            },
+        }, ensure_ascii=False))
+    payload = ("\n".join(lines) + "\n").encode("utf-8")
+
+    batch_debug_dir: Optional[Path] = None
+    if debug_mode and debug_dir:
+        batch_debug_dir = debug_dir / "llm_batch"
+        batch_debug_dir.mkdir(parents=True, exist_ok=True)
+        (batch_debug_dir / "requests.jsonl").write_bytes(payload)
+
+    start_ts = time.time()
+    try:
+        input_file = client.files.create(file=("requests.jsonl", payload), purpose="batch")
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+    except Exception as e:
+        logger.warning(f"Batch submission failed, falling back to synchronous cleanup: {e}")
+        return None
+
+    logger.info(f"Submitted batch {batch.id} with {len(requests)} chunks")
+    if reporter:
+        reporter.on_stage("Batch submitted", {"batch_id": batch.id, "requests": len(requests)})
+
+    # Poll with exponential backoff (5s doubling up to 60s) until terminal state or timeout
+    delay = 5.0
+    while batch.status not in _BATCH_TERMINAL_STATES:
+        elapsed = time.time() - start_ts
+        if elapsed >= timeout_s:
+            logger.warning(f"Batch {batch.id} not finished after {int(elapsed)}s (status {batch.status}); cancelling")
+            try:
+                client.batches.cancel(batch.id)
+            except Exception:
+                pass
+            return None
+        time.sleep(min(delay, max(timeout_s - elapsed, 0.0)))
+        delay = min(delay * 2, 60.0)
+        try:
+            batch = client.batches.retrieve(batch.id)
+        except Exception as e:
+            logger.warning(f"Batch status poll failed: {e}")
+            continue
+        if reporter:
+            reporter.on_stage("Batch status", {"batch_id": batch.id, "status": batch.status, "elapsed_s": int(time.time() - start_ts)})
+
+    if batch.status != "completed" or not batch.output_file_id:
+        logger.warning(f"Batch {batch.id} ended with status {batch.status}; falling back to synchronous cleanup")
+        return None
+
+    try:
+        output_text = client.files.content(batch.output_file_id).text
+    except Exception as e:
+        logger.warning(f"Could not download batch output: {e}")
+        return None
+    if batch_debug_dir:
+        (batch_debug_dir / "responses.jsonl").write_text(output_text, encoding="utf-8")
+
+    results: Dict[str, str] = {}
+    total_tokens_in = 0
+    total_tokens_out = 0
+    for line in output_text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            body = response.get("body") or {}
+            content = body["choices"][0]["message"]["content"]
+            usage = body.get("usage") or {}
+            total_tokens_in += usage.get("prompt_tokens") or 0
+            total_tokens_out += usage.get("completion_tokens") or 0
+        except (ValueError, KeyError, IndexError, TypeError):
+            continue
+        if content:
+            results[record["custom_id"]] = content.strip()
+
+    elapsed = int(time.time() - start_ts)
+    logger.info(f"Batch {batch.id} completed: {len(results)}/{len(requests)} chunks cleaned in {elapsed}s")
+    if reporter:
+        reporter.on_summary(len(requests), 0, total_tokens_in or None, total_tokens_out or None, elapsed)
+    return results
+
+
 def reconstruct_html(cleaned_text: str, original_html: str) -> str:
     """Pure function: reconstruct HTML structure with cleaned text."""
-    if not cleaned_text.strip():
+    if not cleaned_text or cleaned_text.isspace():
         return """<?xml version='1.0' encoding='utf-8'?>
 <html xmlns="http://www.w3.org/1999/xhtml">
 <head><title>Empty Chapter</title></head>
@@ -379,21 +1121,44 @@ def reconstruct_html(cleaned_text: str, original_html: str) -> str:
     if not paragraphs:
         paragraphs = [cleaned_text.strip()]
 
-    html_content = """<?xml version='1.0' encoding='utf-8'?>
+    parts = ["""<?xml version='1.0' encoding='utf-8'?>
 <html xmlns="http://www.w3.org/1999/xhtml">
 <head><title>Chapter</title></head>
 <body>
-"""
+"""]
     for paragraph in paragraphs:
         if paragraph.strip():
+            # Text may contain '&' or '<' (OCR noise, "Tom & Jerry"); unescaped they make the XHTML invalid
             if len(paragraph) < 100 and not paragraph.endswith("."):
-                html_content += f"<h2>{paragraph}</h2>\n"
+                parts.append(f"<h2>{xml_escape(paragraph)}</h2>\n")
             else:
-                html_content += f"<p>{paragraph}</p>\n"
+                parts.append(f"<p>{xml_escape(paragraph)}</p>\n")
 
-    html_content += """</body>
-</html>"""
-    return html_content
+    parts.append("""</body>
+</html>""")
+    return "".join(parts)
+
+
+def build_http_client(max_connections: int = 64) -> Optional[Any]:
+    """Pooled keep-alive transport for the OpenAI SDK, using HTTP/2 when the optional 'h2' package is installed.
+
+    Returns None (SDK defaults) if httpx is not importable. The SDK keeps its own per-request timeouts,
+    which matter here because a full cleanup response can take minutes.
+    """
+    try:
+        import httpx
+    except ImportError:
+        return None
+    import openai
+    options = {
+        "http2": importlib.util.find_spec("h2") is not None,
+        "limits": httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections // 2),
+    }
+    # DefaultHttpxClient (SDK defaults plus our options) only exists in newer 1.x releases
+    default_client = getattr(openai, "DefaultHttpxClient", None)
+    if default_client is None:
+        return httpx.Client(follow_redirects=True, **options)
+    return default_client(**options)
 
 
 # -------- Single, consolidated class (do not redefine below) --------
@@ -450,7 +1215,17 @@ class EPUBOCRCleaner:
         # Runtime tuning config
         self.runtime_cfg = runtime_cfg or CleanerRuntimeConfig()
 
+        # Cleaned text per chunk_key(); the memory layer is reset for every clean_epub() run
+        self._chunk_cache: Union[Dict[bytes, str], LLMCache] = {}
+        if self.runtime_cfg.cache_dir:
+            prompt_digest = hashlib.sha256((_CLEANUP_PROMPT + _MARSHAL_PROMPT).encode("utf-8")).hexdigest()[:16]
+            self._chunk_cache = LLMCache(
+                Path(self.runtime_cfg.cache_dir),
+                namespace=f"{self.azure_cfg.deployment}|{self.runtime_cfg.temperature}|{prompt_digest}",
+            )
+
         # Initialize client
+        import openai
         if client_factory:
             self.client = client_factory(self.azure_cfg)
         else:
@@ -458,6 +1233,7 @@ class EPUBOCRCleaner:
                 api_key=self.azure_cfg.api_key,
                 api_version=self.azure_cfg.api_version,
                 azure_endpoint=self.azure_cfg.endpoint,
+                http_client=build_http_client(),
             )
 
         # Initialize reporters
@@ -468,6 +1244,9 @@ class EPUBOCRCleaner:
                 self.json_reporter = JsonFileProgressReporter(Path(self.status_file))
             except Exception:
                 self.json_reporter = None
+        self.reporter: ProgressReporter = self.console_reporter
+        if self.json_reporter:
+            self.reporter = CompositeReporter([self.console_reporter, self.json_reporter])
 
     # ----- Instance wrappers around pure helpers -----
 
@@ -476,33 +1255,78 @@ class EPUBOCRCleaner:
         return analyze(text)
 
     def chunk_text(self, text: str) -> List[str]:
-        """Instance wrapper that uses runtime_cfg for max_tokens_per_chunk."""
-        return chunk_text(text, self.runtime_cfg.max_tokens_per_chunk)
+        """Instance wrapper that normalizes whitespace and uses runtime_cfg for max_tokens_per_chunk."""
+        return chunk_text(normalize_whitespace(text), self.runtime_cfg.max_tokens_per_chunk)
 
     def clean_text_with_llm(self, text: str) -> str:
         """Clean text using Azure GPT-4.1 (uses pure helpers)."""
-        chunks = self.chunk_text(text)
-        # Combine reporters
-        reporter: Optional[ProgressReporter] = self.console_reporter
-        if self.json_reporter:
-            # simple composite behavior: call both by wrapping
-            class CompositeReporter(ProgressReporter):
-                def __init__(self, a: ProgressReporter, b: ProgressReporter) -> None:
-                    self.a = a; self.b = b
-                def on_stage(self, s, e=None): self.a.on_stage(s, e); self.b.on_stage(s, e)
-                def on_chunking_done(self, t): self.a.on_chunking_done(t); self.b.on_chunking_done(t)
-                def on_chunk_start(self, i, t): self.a.on_chunk_start(i, t); self.b.on_chunk_start(i, t)
-                def on_llm_submit(self, i, t): self.a.on_llm_submit(i, t); self.b.on_llm_submit(i, t)
-                def on_llm_wait_start(self, i, t): self.a.on_llm_wait_start(i, t); self.b.on_llm_wait_start(i, t)
-                def on_llm_wait_heartbeat(self, i, t, e): self.a.on_llm_wait_heartbeat(i, t, e); self.b.on_llm_wait_heartbeat(i, t, e)
-                def on_llm_wait_end(self, i, t, l): self.a.on_llm_wait_end(i, t, l); self.b.on_llm_wait_end(i, t, l)
-                def on_chunk_result(self, i, t, ti, to, l): self.a.on_chunk_result(i, t, ti, to, l); self.b.on_chunk_result(i, t, ti, to, l)
-                def on_retry(self, i, a, m, b, e): self.a.on_retry(i, a, m, b, e); self.b.on_retry(i, a, m, b, e)
-                def on_error_giveup(self, i, e): self.a.on_error_giveup(i, e); self.b.on_error_giveup(i, e)
-                def on_summary(self, t, r, ti, to, e): self.a.on_summary(t, r, ti, to, e); self.b.on_summary(t, r, ti, to, e)
-            reporter = CompositeReporter(self.console_reporter, self.json_reporter)
-
-        cleaned_chunks = clean_chunks(
+        return "\n\n".join(self._clean_chunks(self.chunk_text(text)))
+
+    def clean_texts_with_llm(self, texts: List[str]) -> List[str]:
+        """Clean several texts (e.g. all chapters of a book) in one clean_chunks() call.
+
+        Pooling the chunks lets short chapters share the concurrency and marshaling budget
+        instead of being sent one chapter at a time.
+        """
+        chunked = [self.chunk_text(text) for text in texts]
+        cleaned = iter(self._clean_chunks([chunk for chunks in chunked for chunk in chunks]))
+        return ["\n\n".join(next(cleaned) for _ in chunks) for chunks in chunked]
+
+    def clean_texts_with_batch_api(self, texts: List[str]) -> List[str]:
+        """Clean several texts through one Batch API job; unfinished chunks are cleaned synchronously.
+
+        Chunks are selected as in clean_chunks(): artifact-free chunks are kept as-is (unless
+        force_llm), cached ones are not resubmitted, and repeated chunks are sent once.
+        """
+        chunked = [self.chunk_text(text) for text in texts]
+        chunks = [chunk for item_chunks in chunked for chunk in item_chunks]
+        cleaned = list(chunks)
+
+        keys: Dict[int, bytes] = {}
+        pending: Dict[bytes, int] = {}  # chunk_key -> first chunk index
+        for idx, chunk in enumerate(chunks):
+            if not (self.runtime_cfg.force_llm or has_artifacts(chunk)):
+                continue
+            key = keys[idx] = chunk_key(chunk)
+            hit = self._chunk_cache.get(key)
+            if hit is not None:
+                cleaned[idx] = hit
+            elif key not in pending:
+                pending[key] = idx
+
+        submitted = clean_chunks_batch(
+            requests=[(f"chunk_{idx + 1}", chunks[idx]) for idx in pending.values()],
+            client=self.client,
+            deployment=self.azure_cfg.deployment or "",
+            temperature=self.runtime_cfg.temperature,
+            max_tokens_response=self.runtime_cfg.max_tokens_response,
+            timeout_s=self.runtime_cfg.batch_timeout_minutes * 60,
+            debug_mode=self.debug_mode,
+            debug_dir=self.debug_dir,
+            reporter=self._reporter(),
+        ) or {}
+        resolved: Dict[bytes, str] = {}
+        missing: List[int] = []
+        for key, idx in pending.items():
+            text = submitted.get(f"chunk_{idx + 1}")
+            if text is None:
+                missing.append(idx)
+            else:
+                resolved[key] = self._chunk_cache[key] = text
+
+        # Anything the job did not return is cleaned synchronously, in a single pooled call
+        if missing:
+            for idx, text in zip(missing, self._clean_chunks([chunks[idx] for idx in missing])):
+                resolved[keys[idx]] = text
+        for idx, key in keys.items():
+            if key in resolved:
+                cleaned[idx] = resolved[key]
+
+        merged = iter(cleaned)
+        return ["\n\n".join(next(merged) for _ in item_chunks) for item_chunks in chunked]
+
+    def _clean_chunks(self, chunks: List[str]) -> List[str]:
+        return clean_chunks(
             chunks=chunks,
             client=self.client,
             deployment=self.azure_cfg.deployment or "",
@@ -510,9 +1334,18 @@ class EPUBOCRCleaner:
             max_tokens_response=self.runtime_cfg.max_tokens_response,
             debug_mode=self.debug_mode,
             debug_dir=self.debug_dir,
-            reporter=reporter,
+            reporter=self._reporter(),
+            marshal_batch_size=self.runtime_cfg.marshal_batch_size,
+            cache=self._chunk_cache,
+            max_retries=self.runtime_cfg.max_retries,
+            retry_delay=self.runtime_cfg.retry_delay,
+            stream=self.runtime_cfg.stream_responses,
+            force_llm=self.runtime_cfg.force_llm,
+            max_concurrency=self.runtime_cfg.max_concurrency,
         )
-        return "\n\n".join(cleaned_chunks)
+
+    def _reporter(self) -> ProgressReporter:
+        return self.reporter
 
     def reconstruct_html(self, cleaned_text: str, original_html: str) -> str:
         """Instance wrapper calling pure reconstruct_html()."""
@@ -520,55 +1353,58 @@ class EPUBOCRCleaner:
 
     # ----- File/EPUB operations -----
 
-    def extract_epub_content(self, epub_path: str) -> Tuple[Dict, str]:
+    @staticmethod
+    def _is_navigation_file(file_name: str) -> bool:
+        return is_navigation_file(file_name)
+
+    def extract_epub_content(self, epub_path: str) -> Tuple[Dict, Optional[str]]:
         """Extract content from EPUB file"""
         logger.info(f"Extracting EPUB content from: {epub_path}")
 
-        # Create temporary directory for extraction
+        # Only debug runs keep a copy of the EPUB documents on disk (for inspection)
+        temp_dir: Optional[str] = None
         if self.debug_mode and self.debug_dir:
             extract_base_dir = self.debug_dir / "epub_extracted_content"
             extract_base_dir.mkdir(parents=True, exist_ok=True)
             temp_dir = tempfile.mkdtemp(dir=extract_base_dir)
             logger.debug(f"EPUB content extracted to: {temp_dir}")
-        else:
-            temp_dir = tempfile.mkdtemp()
 
         try:
-            # Extract EPUB (which is a ZIP file)
-            with zipfile.ZipFile(epub_path, 'r') as zip_ref:
-                zip_ref.extractall(temp_dir)
-
-            # Read the EPUB using ebooklib
-            book = epub.read_epub(epub_path)
+            # Read the EPUB once using ebooklib (no separate zip extraction pass)
+            book = read_epub_text(epub_path)
 
             # Extract text content from all items
             content_items = []
             for item in book.get_items():
                 if item.get_type() == 9:  # EBOOKLIB_ITEM_DOCUMENT
-                    soup = BeautifulSoup(item.get_content(), 'lxml-xml')
-                    text_content = soup.get_text()
+                    # Navigation/package documents carry no book text: skip them before parsing
+                    if self._is_navigation_file(item.get_name()):
+                        logger.debug(f"Skipping navigation file: {item.get_name()}")
+                        continue
+                    raw = item.get_content()
+                    text_content = html_to_text(raw)
+
+                    if temp_dir:
+                        # Drop '..'/absolute parts so artifacts stay inside temp_dir
+                        parts = [p for p in Path(item.get_name()).parts if p not in ('..', '/', '\\')]
+                        target = Path(temp_dir, *parts)
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        target.write_bytes(raw)
 
                     content_items.append({
                         'id': item.get_id(),
                         'file_name': item.get_name(),
                         'title': getattr(item, 'title', ''),
                         'content': text_content,
-                        'html_content': item.get_content().decode('utf-8')
+                        'html_content': raw.decode('utf-8')
                     })
 
-            metadata = {
-                'title': book.get_metadata('DC', 'title')[0][0] if book.get_metadata('DC', 'title') else 'Unknown',
-                'author': book.get_metadata('DC', 'creator')[0][0] if book.get_metadata('DC', 'creator') else 'Unknown',
-                'language': book.get_metadata('DC', 'language')[0][0] if book.get_metadata('DC', 'language') else 'hu',
-                'identifier': book.get_metadata('DC', 'identifier')[0][0] if book.get_metadata('DC', 'identifier') else 'unknown'
-            }
+            metadata = read_dc_metadata(book)
 
             return {'content_items': content_items, 'metadata': metadata}, temp_dir
 
         except Exception as e:
-            # Only remove temp_dir if not in debug mode, otherwise leave for inspection
-            if not (self.debug_mode and self.debug_dir):
-                shutil.rmtree(temp_dir, ignore_errors=True)
+            # temp_dir (debug only) is left for inspection
             raise EPUBError(f"Error extracting EPUB: {str(e)}")
 
     def create_cleaned_epub(self, original_data: Dict, cleaned_content: List[Dict], output_path: str, debug: bool = False):
@@ -602,7 +1438,7 @@ class EPUBOCRCleaner:
                 logger.debug(f"Processing chapter {i+1}: {item_data['file_name']}")
 
             html_content = item_data.get('cleaned_html', '')
-            if not html_content.strip():
+            if not html_content or html_content.isspace():
                 if debug:
                     logger.debug(f"Empty HTML content for {item_data['file_name']}, creating placeholder")
                 html_content = """<?xml version='1.0' encoding='utf-8'?>
@@ -629,7 +1465,7 @@ class EPUBOCRCleaner:
                     chapter.content = html_content
 
                 if debug:
-                    print(f"🔍 DEBUG: Set content for {item_data['file_name']} - Content type: {type(chapter.content)}, Length: {len(chapter.content)}")
+                    logger.debug(f"Set content for {item_data['file_name']} - Content type: {type(chapter.content)}, Length: {len(chapter.content)}")
 
             except Exception as e:
                 logger.error(f"Error setting content for {item_data['file_name']}: {str(e)}")
@@ -659,7 +1495,7 @@ class EPUBOCRCleaner:
             chapters.append(placeholder_chapter)
 
         if debug:
-            print(f"🔍 DEBUG: Total chapters to include: {len(chapters)}")
+            logger.debug(f"Total chapters to include: {len(chapters)}")
 
         # Define table of contents and spine
         book.toc = chapters
@@ -674,7 +1510,7 @@ class EPUBOCRCleaner:
 
         # Write the EPUB
         try:
-            epub.write_epub(output_path, book, {})
+            write_epub_file(output_path, book)
             logger.info(f"Cleaned EPUB saved to: {output_path}")
         except Exception as e:
             logger.error(f"Error writing EPUB: {str(e)}")
@@ -687,12 +1523,16 @@ class EPUBOCRCleaner:
             output_path = f"{base_name}_cleaned.epub"
 
         logger.info(f"Starting EPUB cleanup: {input_path}")
+        if isinstance(self._chunk_cache, LLMCache):
+            self._chunk_cache.clear_memory()
+        else:
+            self._chunk_cache = {}
         logger.info(f"Output will be saved to: {output_path}")
 
         # Create backup
         backup_path = f"{input_path}.backup"
         if not os.path.exists(backup_path):
-            shutil.copy2(input_path, backup_path)
+            clone_file(input_path, backup_path)
             logger.info(f"Backup created: {backup_path}")
 
         # Create interim directory if saving to disk
@@ -709,7 +1549,7 @@ class EPUBOCRCleaner:
 
         try:
             # Extract content
-            original_data, temp_dir = self.extract_epub_content(input_path)
+            original_data, _ = self.extract_epub_content(input_path)
 
             if debug:
                 logger.debug(f"Found {len(original_data['content_items'])} content items")
@@ -727,67 +1567,71 @@ class EPUBOCRCleaner:
             cleaned_content = []
             total_artifacts = 0
 
+            # Select the items to clean once: skip items without text (navigation files are never extracted)
+            to_clean = []
             for item in original_data['content_items']:
-                # Skip navigation files and other special files
-                if item['file_name'] in ['nav.xhtml', 'toc.ncx', 'content.opf'] or 'nav' in item['file_name'].lower():
-                    if debug:
-                        logger.debug(f"Skipping navigation file: {item['file_name']}")
-                    continue
-
-                if item['content'].strip():  # Only process items with content
-                    logger.info(f"Processing: {item['file_name']}")
-
-                    # Analyze artifacts
-                    artifacts = self.analyze_ocr_artifacts(item['content'])
-                    total_artifacts += sum(artifacts.values())
-                    logger.info(f"Found artifacts: {artifacts}")
-
+                if not item['content'] or item['content'].isspace():
                     if debug:
-                        logger.debug(f"Original content preview (first 200 chars): {repr(item['content'][:200])}")
+                        logger.debug(f"Skipping empty item: {item['file_name']}")
+                else:
+                    to_clean.append(item)
 
-                    # Clean text with LLM
-                    cleaned_text = self.clean_text_with_llm(item['content'])
+            # Clean every chapter up-front: one pooled clean_chunks() call, or a single Batch API job
+            logger.info(f"Cleaning {len(to_clean)} content items")
+            if self.runtime_cfg.use_batch_api:
+                cleaned_texts = self.clean_texts_with_batch_api([item['content'] for item in to_clean])
+            else:
+                cleaned_texts = self.clean_texts_with_llm([item['content'] for item in to_clean])
+
+            # Text previews slice and repr() whole paragraphs; skip them unless DEBUG records are actually emitted
+            log_previews = debug and logger.isEnabledFor(logging.DEBUG)
+            for item, cleaned_text in zip(to_clean, cleaned_texts):
+                file_name = item['file_name']
+                content = item['content']
+                logger.info(f"Processing: {file_name}")
+
+                # Analyze artifacts
+                artifacts = self.analyze_ocr_artifacts(content)
+                total_artifacts += sum(artifacts.values())
+                logger.info(f"Found artifacts: {artifacts}")
+
+                if log_previews:
+                    logger.debug(f"Original content preview (first 200 chars): {repr(content[:200])}")
+                    logger.debug(f"Cleaned text preview (first 200 chars): {repr(cleaned_text[:200])}")
+
+                # Reconstruct HTML
+                cleaned_html = self.reconstruct_html(cleaned_text, item['html_content'])
+
+                if log_previews:
+                    logger.debug(f"HTML content preview (first 300 chars): {repr(cleaned_html[:300])}")
+
+                # Save interim results to disk if requested
+                if save_interim and interim_dir:
+                    interim_file = os.path.join(interim_dir, f"{file_name}.json")
+                    interim_data = {
+                        'file_name': file_name,
+                        'title': item['title'],
+                        'original_content': content,
+                        'cleaned_text': cleaned_text,
+                        'cleaned_html': cleaned_html,
+                        'artifacts': artifacts
+                    }
+                    # Only kept for inspection in debug runs; otherwise machine-only and deleted at the end
+                    write_json(interim_file, interim_data, indent=self.debug_mode)
 
                     if debug:
-                        logger.debug(f"Cleaned text preview (first 200 chars): {repr(cleaned_text[:200])}")
+                        logger.debug(f"Saved interim results to: {interim_file}")
 
-                    # Reconstruct HTML
-                    cleaned_html = self.reconstruct_html(cleaned_text, item['html_content'])
+                cleaned_content.append({
+                    'file_name': file_name,
+                    'title': item['title'],
+                    'cleaned_html': cleaned_html
+                })
 
-                    if debug:
-                        logger.debug(f"HTML content preview (first 300 chars): {repr(cleaned_html[:300])}")
-
-                    # Save interim results to disk if requested
-                    if save_interim and interim_dir:
-                        interim_file = os.path.join(interim_dir, f"{item['file_name']}.json")
-                        interim_data = {
-                            'file_name': item['file_name'],
-                            'title': item['title'],
-                            'original_content': item['content'],
-                            'cleaned_text': cleaned_text,
-                            'cleaned_html': cleaned_html,
-                            'artifacts': artifacts
-                        }
-                        with open(interim_file, 'w', encoding='utf-8') as f:
-                            json.dump(interim_data, f, ensure_ascii=False, indent=2)
-
-                        if debug:
-                            logger.debug(f"Saved interim results to: {interim_file}")
-
-                        cleaned_content.append({
-                            'file_name': item['file_name'],
-                            'title': item['title'],
-                            'cleaned_html': cleaned_html
-                        })
-                    else:
-                        cleaned_content.append({
-                            'file_name': item['file_name'],
-                            'title': item['title'],
-                            'cleaned_html': cleaned_html
-                        })
-                else:
-                    if debug:
-                        logger.debug(f"Skipping empty item: {item['file_name']}")
+            # Only metadata is needed from here on: release the source and cleaned texts before the
+            # output EPUB is assembled in memory, instead of holding the book twice over during the write
+            original_data['content_items'] = []
+            del to_clean, cleaned_texts
 
             if debug:
                 logger.debug(f"Final cleaned_content has {len(cleaned_content)} items")
@@ -797,10 +1641,6 @@ class EPUBOCRCleaner:
             # Create new EPUB
             self.create_cleaned_epub(original_data, cleaned_content, output_path, debug=debug)
 
-            # Cleanup temporary extraction directory if not in debug mode
-            if not (self.debug_mode and self.debug_dir):
-                shutil.rmtree(temp_dir, ignore_errors=True)
-
             # Cleanup interim JSON directory if not in debug mode
             if save_interim and interim_dir and not (self.debug_mode and self.debug_dir):
                 shutil.rmtree(interim_dir, ignore_errors=True)
@@ -813,3 +1653,5 @@ class EPUBOCRCleaner:
         except Exception as e:
             logger.error(f"Error during cleanup: {str(e)}")
             raise EPUBError(str(e))
+        finally:
+            self.reporter.close()
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from scan2epub.utils.io import json_line
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache(MutableMapping):
+    """
+    Content-addressed on-disk cache of cleaned chunks, fronted by an in-memory dict.
+
+    Keys are chunk_key() digests. On disk they are combined with a namespace (deployment,
+    temperature, prompt digest), so changing any of those never serves stale output; entries
+    live in cache_dir/<sha[:2]>/<sha>.json. Iteration and len() only cover entries touched in
+    this process. Unreadable entries count as misses; write failures are logged and ignored.
+    """
+
+    def __init__(self, cache_dir: Path, namespace: str):
+        self.cache_dir = Path(cache_dir)
+        self.namespace = namespace
+        self._ns_bytes = namespace.encode("utf-8")
+        self._memory: Dict[bytes, str] = {}
+
+    def _path(self, key: bytes) -> Path:
+        digest = hashlib.sha256(len(self._ns_bytes).to_bytes(8, "little") + self._ns_bytes + key).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}.json"
+
+    def get(self, key: bytes, default: Optional[str] = None) -> Optional[str]:
+        value = self._memory.get(key)
+        if value is not None:
+            return value
+        try:
+            value = json.loads(self._path(key).read_bytes())["value"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return default
+        self._memory[key] = value
+        return value
+
+    def __getitem__(self, key: bytes) -> str:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, bytes) and self.get(key) is not None
+
+    def __setitem__(self, key: bytes, value: str) -> None:
+        self._memory[key] = value
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(json_line({"value": value, "namespace": self.namespace, "created": time.time()}))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            tmp_path.unlink(missing_ok=True)
+            logger.warning(f"Could not write LLM cache entry {path}: {e}")
+
+    def __delitem__(self, key: bytes) -> None:
+        in_memory = self._memory.pop(key, None) is not None
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            if not in_memory:
+                raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter(list(self._memory))
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def clear_memory(self) -> None:
+        """Drop the in-memory layer (the disk entries stay)."""
+        self._memory = {}
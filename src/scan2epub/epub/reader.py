@@ -0,0 +1,26 @@
+from pathlib import PurePosixPath
+
+from ebooklib import epub
+
+from scan2epub.epub.writer import STORED_EXTENSIONS
+
+
+class _TextOnlyEpubReader(epub.EpubReader):
+    """ebooklib reader that leaves binary media (images, fonts, audio) unread: their items get empty content."""
+
+    def read_file(self, name):
+        if PurePosixPath(name).suffix.lower() in STORED_EXTENSIONS:
+            return b""
+        return super().read_file(name)
+
+
+def read_epub_text(epub_path: str) -> epub.EpubBook:
+    """
+    Like epub.read_epub, but without decompressing media entries. Cleaning and translation
+    rebuild the book from its documents and metadata only, so images and fonts (often most
+    of a scanned book's bytes) never need to be read.
+    """
+    reader = _TextOnlyEpubReader(epub_path)
+    book = reader.load()
+    reader.process()
+    return book
@@ -1,24 +1,39 @@
-import json
 import logging
 import os
-import shutil
+import re
 import tempfile
 import time
-import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-from bs4 import BeautifulSoup
 from ebooklib import epub
 
 from scan2epub.translate.translator import ITranslator
 from scan2epub.utils.errors import EPUBError, TranslationError
+from scan2epub.utils.io import write_json
+from scan2epub.utils.status import StatusWriter
 # Reuse the same HTML reconstruction heuristic used by the cleaner to keep consistency
-from scan2epub.epub.cleaner import reconstruct_html
+from scan2epub.epub.cleaner import chunk_key, html_to_text, is_navigation_file, read_dc_metadata, reconstruct_html
+from scan2epub.epub.llm_cache import LLMCache
+from scan2epub.epub.writer import write_epub_file
+from scan2epub.epub.reader import read_epub_text
 
 logger = logging.getLogger("scan2epub.epub.translator")
 
+# Paragraph separator: a line break, optional whitespace, another line break
+_RE_BLANK_LINE = re.compile(r"\n\s*\n")
+
+# Any letter in any script: paragraphs without one have nothing to translate
+_RE_LETTER = re.compile(r"[^\W\d_]")
+
+_PLACEHOLDER_HTML = b"""<?xml version='1.0' encoding='utf-8'?>
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head><title>Placeholder</title></head>
+<body><p>This EPUB was processed but no readable content was found after translation.</p></body>
+</html>"""
+
 
 @dataclass
 class TranslatorRuntimeConfig:
@@ -28,6 +43,8 @@ class TranslatorRuntimeConfig:
     """
     max_paragraphs_per_batch: int = 100
     max_chars_per_batch: int = 30000  # keep conservative headroom
+    # Translation requests in flight at once (1 = sequential)
+    max_concurrent_batches: int = 4
     title_suffix_template: str = " (Translated to {lang})"
 
 
@@ -44,6 +61,7 @@ class EPUBTranslator:
         allow_noop: bool = False,
         min_changed_ratio: float = 0.0,
         runtime_cfg: Optional[TranslatorRuntimeConfig] = None,
+        cache_dir: Optional[Path] = None,
     ) -> None:
         self.translator = translator
         self.debug_mode = debug_mode
@@ -52,6 +70,9 @@ class EPUBTranslator:
         self.allow_noop = allow_noop
         self.min_changed_ratio = min_changed_ratio
         self.runtime_cfg = runtime_cfg or TranslatorRuntimeConfig()
+        # Persist translated paragraphs here and reuse them across runs (None: no disk cache)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._status_writer = StatusWriter(self.status_file, event="translate")
 
         if self.debug_mode and self.debug_dir:
             self.debug_dir.mkdir(parents=True, exist_ok=True)
@@ -59,69 +80,62 @@ class EPUBTranslator:
     # ------- Status helper -------
 
     def _status(self, event: str, **extras: Any) -> None:
-        if not self.status_file:
-            return
-        try:
-            self.status_file.parent.mkdir(parents=True, exist_ok=True)
-            with self.status_file.open("a", encoding="utf-8") as f:
-                payload = {"t": time.time(), "event": "translate", "stage": event}
-                if extras:
-                    payload.update(extras)
-                f.write(json.dumps(payload, ensure_ascii=False) + "\n")
-        except Exception:
-            pass
+        # Batches report from worker threads; StatusWriter keeps one shared, locked handle
+        self._status_writer.emit(event, **extras)
+
+    def _close_status(self) -> None:
+        self._status_writer.close()
 
     # ------- EPUB helpers (adapted from cleaner) -------
 
-    def extract_epub_content(self, epub_path: str) -> Tuple[Dict[str, Any], str]:
+    def extract_epub_content(self, epub_path: str) -> Tuple[Dict[str, Any], Optional[str]]:
         """Extract content from EPUB file (parallel to cleaner.extract_epub_content)."""
         logger.info(f"Extracting EPUB content from: {epub_path}")
 
-        # Create temporary directory for extraction
+        # Only debug runs keep a copy of the EPUB documents on disk (for inspection)
+        temp_dir: Optional[str] = None
         if self.debug_mode and self.debug_dir:
             extract_base_dir = self.debug_dir / "epub_extracted_content_for_translation"
             extract_base_dir.mkdir(parents=True, exist_ok=True)
             temp_dir = tempfile.mkdtemp(dir=extract_base_dir)
             logger.debug(f"EPUB content extracted to: {temp_dir}")
-        else:
-            temp_dir = tempfile.mkdtemp()
 
         try:
-            # Extract EPUB (which is a ZIP file)
-            with zipfile.ZipFile(epub_path, 'r') as zip_ref:
-                zip_ref.extractall(temp_dir)
-
-            # Read the EPUB using ebooklib
-            book = epub.read_epub(epub_path)
+            # Read the EPUB once using ebooklib (no separate zip extraction pass)
+            book = read_epub_text(epub_path)
 
             # Extract text content from all items
             content_items = []
             for item in book.get_items():
                 if item.get_type() == 9:  # EBOOKLIB_ITEM_DOCUMENT
-                    soup = BeautifulSoup(item.get_content(), 'lxml-xml')
-                    text_content = soup.get_text()
+                    # Navigation/package documents carry no book text: skip them before parsing
+                    if is_navigation_file(item.get_name()):
+                        logger.debug(f"Skipping navigation file: {item.get_name()}")
+                        continue
+                    raw = item.get_content()
+                    text_content = html_to_text(raw)
+
+                    if temp_dir:
+                        # Drop '..'/absolute parts so artifacts stay inside temp_dir
+                        parts = [p for p in Path(item.get_name()).parts if p not in ('..', '/', '\\')]
+                        target = Path(temp_dir, *parts)
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        target.write_bytes(raw)
 
                     content_items.append({
                         'id': item.get_id(),
                         'file_name': item.get_name(),
                         'title': getattr(item, 'title', ''),
                         'content': text_content,
-                        'html_content': item.get_content().decode('utf-8')
+                        'html_content': raw.decode('utf-8')
                     })
 
-            metadata = {
-                'title': book.get_metadata('DC', 'title')[0][0] if book.get_metadata('DC', 'title') else 'Unknown',
-                'author': book.get_metadata('DC', 'creator')[0][0] if book.get_metadata('DC', 'creator') else 'Unknown',
-                'language': book.get_metadata('DC', 'language')[0][0] if book.get_metadata('DC', 'language') else 'hu',
-                'identifier': book.get_metadata('DC', 'identifier')[0][0] if book.get_metadata('DC', 'identifier') else 'unknown'
-            }
+            metadata = read_dc_metadata(book)
 
             return {'content_items': content_items, 'metadata': metadata}, temp_dir
 
         except Exception as e:
-            # Only remove temp_dir if not in debug mode, otherwise leave for inspection
-            if not (self.debug_mode and self.debug_dir):
-                shutil.rmtree(temp_dir, ignore_errors=True)
+            # temp_dir (debug only) is left for inspection
             raise EPUBError(f"Error extracting EPUB for translation: {str(e)}")
 
     def _split_paragraphs(self, text: str) -> List[str]:
@@ -130,12 +144,12 @@ class EPUBTranslator:
         """
         if not text:
             return []
-        # Primary split by double newlines
-        parts = [p.strip() for p in text.split("\n\n") if p.strip()]
+        # Primary split by blank lines (including whitespace-only and \r\n ones)
+        parts = [p.strip() for p in _RE_BLANK_LINE.split(text) if p and not p.isspace()]
         if parts:
             return parts
         # Fallback: split by single newlines and group short lines
-        lines = [ln.strip() for ln in text.split("\n")]
+        lines = [ln.strip() for ln in text.splitlines()]
         acc: List[str] = []
         buf: List[str] = []
         cur_len = 0
@@ -189,22 +203,47 @@ class EPUBTranslator:
     ) -> List[str]:
         """
         Translate paragraphs using the provided translator; writes debug artifacts when enabled.
+        Paragraphs without any letters (page numbers, '* * *', '12.') are passed through untranslated;
+        repeated paragraphs (running headers, boilerplate) are sent once, and with cache_dir set,
+        paragraphs translated by an earlier run are not sent at all.
         """
         if not paragraphs:
             return []
-        translated: List[str] = []
-        batches = self._batch_paragraphs(paragraphs)
+        cache: Optional[LLMCache] = None
+        if self.cache_dir:
+            provider = type(self.translator).__name__
+            cache = LLMCache(self.cache_dir, namespace=f"translate|{provider}|{from_lang or 'auto'}|{to_lang}")
+
+        done: Dict[str, str] = {}
+        pending: List[str] = []
+        for p in paragraphs:
+            if p in done or not _RE_LETTER.search(p):
+                continue
+            hit = cache.get(chunk_key(p)) if cache is not None else None
+            if hit is not None:
+                done[p] = hit
+            else:
+                done[p] = p  # placeholder until translated; also dedups repeats
+                pending.append(p)
+
+        batches = self._batch_paragraphs(pending)
         total = len(batches)
-        self._status("translate_item_chunking_done", batches=total, paragraphs=len(paragraphs))
-        for i, batch in enumerate(batches, start=1):
+        self._status(
+            "translate_item_chunking_done",
+            batches=total,
+            paragraphs=len(paragraphs),
+            cached=len(done) - len(pending),
+        )
+
+        def _translate_batch(i: int, batch: List[str]) -> List[str]:
             self._status("translate_batch_start", idx=i, total=total, batch_size=len(batch))
             # Debug: save request
             if self.debug_mode and llm_debug_dir:
                 try:
                     llm_debug_dir.mkdir(parents=True, exist_ok=True)
-                    (llm_debug_dir / f"translator_batch_{i}_request.json").write_text(
-                        json.dumps({"to": to_lang, "from": from_lang, "segments": batch}, ensure_ascii=False, indent=2),
-                        encoding="utf-8",
+                    write_json(
+                        llm_debug_dir / f"translator_batch_{i}_request.json",
+                        {"to": to_lang, "from": from_lang, "segments": batch},
                     )
                 except Exception:
                     pass
@@ -212,19 +251,40 @@ class EPUBTranslator:
             t0 = time.time()
             out = self.translator.translate_text(batch, to_lang=to_lang, from_lang=from_lang)
             latency = time.time() - t0
-            translated.extend(out)
+            # Results are matched to paragraphs by position: a short or long batch would shift every later one
+            if len(out) != len(batch):
+                raise TranslationError(
+                    f"Translator returned {len(out)} segments for batch {i} of {len(batch)} paragraphs"
+                )
+            if cache is not None:
+                # Saved per batch, so an interrupted run keeps every batch already translated.
+                # Output equal to the input is either invariant or a provider fallback: not worth caching
+                for p, text in zip(batch, out):
+                    if text != p:
+                        cache[chunk_key(p)] = text
             self._status("translate_batch_done", idx=i, total=total, latency_s=round(latency, 3))
 
             # Debug: save response
             if self.debug_mode and llm_debug_dir:
                 try:
-                    (llm_debug_dir / f"translator_batch_{i}_response.json").write_text(
-                        json.dumps({"translated": out}, ensure_ascii=False, indent=2),
-                        encoding="utf-8",
-                    )
+                    write_json(llm_debug_dir / f"translator_batch_{i}_response.json", {"translated": out})
                 except Exception:
                     pass
-        return translated
+            return out
+
+        # Batches are independent HTTP requests: overlap their round-trips, keeping output order
+        workers = min(self.runtime_cfg.max_concurrent_batches, total)
+        if not batches:
+            results: List[List[str]] = []
+        elif workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_translate_batch, range(1, total + 1), batches))
+        else:
+            results = [_translate_batch(i, batch) for i, batch in enumerate(batches, start=1)]
+
+        for batch, out in zip(batches, results):
+            done.update(zip(batch, out))
+        return [done.get(p, p) for p in paragraphs]
 
     def _create_translated_epub(
         self,
@@ -264,7 +324,7 @@ class EPUBTranslator:
                 logger.debug(f"Processing chapter {i+1}: {item_data['file_name']}")
 
             html_content = item_data.get('translated_html', '')
-            if not html_content.strip():
+            if not html_content or html_content.isspace():
                 if debug:
                     logger.debug(f"Empty HTML content for {item_data['file_name']}, creating placeholder")
                 html_content = """<?xml version='1.0' encoding='utf-8'?>
@@ -280,14 +340,9 @@ class EPUBTranslator:
                 lang=target_lang
             )
 
-            try:
-                if isinstance(html_content, str):
-                    chapter.content = html_content.encode('utf-8')
-                else:
-                    chapter.content = html_content
-            except Exception as e:
-                logger.error(f"Error setting content for {item_data['file_name']}: {str(e)}")
-                chapter.content = html_content
+            # Encode once and drop the str, so only the book's bytes copy of each chapter stays alive
+            chapter.content = html_content.encode('utf-8') if isinstance(html_content, str) else html_content
+            item_data['translated_html'] = None
 
             book.add_item(chapter)
             chapters.append(chapter)
@@ -298,12 +353,7 @@ class EPUBTranslator:
                 file_name='placeholder.xhtml',
                 lang=target_lang
             )
-            placeholder_content = """<?xml version='1.0' encoding='utf-8'?>
-<html xmlns="http://www.w3.org/1999/xhtml">
-<head><title>Placeholder</title></head>
-<body><p>This EPUB was processed but no readable content was found after translation.</p></body>
-</html>"""
-            placeholder_chapter.content = placeholder_content.encode('utf-8')
+            placeholder_chapter.content = _PLACEHOLDER_HTML
             book.add_item(placeholder_chapter)
             chapters.append(placeholder_chapter)
 
@@ -320,7 +370,7 @@ class EPUBTranslator:
 
         # Write the EPUB
         try:
-            epub.write_epub(output_path, book, {})
+            write_epub_file(output_path, book)
             logger.info(f"Translated EPUB saved to: {output_path}")
         except Exception as e:
             logger.error(f"Error writing translated EPUB: {str(e)}")
@@ -343,7 +393,7 @@ class EPUBTranslator:
         logger.info(f"Starting EPUB translation: {input_epub} -> {output_epub} (to: {to_lang})")
 
         # Extract content
-        original_data, temp_dir = self.extract_epub_content(input_epub)
+        original_data, _ = self.extract_epub_content(input_epub)
 
         try:
             if debug:
@@ -358,15 +408,11 @@ class EPUBTranslator:
             total_paragraphs = 0
             changed_paragraphs = 0
 
+            # Navigation files are already left out by extract_epub_content
+            to_translate: List[Tuple[Dict[str, Any], List[str]]] = []
             for item in original_data['content_items']:
-                # Skip navigation files and other special files
-                if item['file_name'] in ['nav.xhtml', 'toc.ncx', 'content.opf'] or 'nav' in item['file_name'].lower():
-                    if debug:
-                        logger.debug(f"Skipping navigation file: {item['file_name']}")
-                    continue
-
                 text = item.get('content', '') or ''
-                if not text.strip():
+                if not text or text.isspace():
                     if debug:
                         logger.debug(f"Skipping empty item: {item['file_name']}")
                     continue
@@ -375,8 +421,20 @@ class EPUBTranslator:
                 paragraphs = self._split_paragraphs(text)
                 total_paragraphs += len(paragraphs)
                 self._status("translate_item_start", file=item['file_name'], paragraphs=len(paragraphs))
-
-                translated_paragraphs = self._translate_paragraphs(paragraphs, to_lang, from_lang, llm_debug_dir)
+                to_translate.append((item, paragraphs))
+
+            # Translate all items' paragraphs in one pooled call, so short chapters share batches
+            # and the concurrency budget instead of being sent one item at a time
+            all_paragraphs = [p for _, paragraphs in to_translate for p in paragraphs]
+            translated_list = self._translate_paragraphs(all_paragraphs, to_lang, from_lang, llm_debug_dir)
+            if len(translated_list) != len(all_paragraphs):
+                raise TranslationError(
+                    f"Translator returned {len(translated_list)} segments for {len(all_paragraphs)} paragraphs"
+                )
+            translated_all = iter(translated_list)
+
+            for item, paragraphs in to_translate:
+                translated_paragraphs = [next(translated_all) for _ in paragraphs]
                 # Track changes for quality guardrails
                 try:
                     diffs = sum(1 for a, b in zip(paragraphs, translated_paragraphs) if (a or "").strip() != (b or "").strip())
@@ -430,6 +488,4 @@ class EPUBTranslator:
             self._status("translate_error", error=str(e))
             raise
         finally:
-            # Cleanup temporary extraction directory if not in debug mode
-            if not (self.debug_mode and self.debug_dir):
-                shutil.rmtree(temp_dir, ignore_errors=True)
+            self._close_status()
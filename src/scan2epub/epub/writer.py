@@ -0,0 +1,64 @@
+import io
+import os
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Union
+
+from ebooklib import epub
+
+
+# XHTML compresses well; level 3 is within a few percent of 6 at roughly half the CPU cost
+DEFAULT_COMPRESSLEVEL = 3
+
+# Already-compressed formats: deflating them burns CPU for ~0 bytes saved
+STORED_EXTENSIONS = frozenset({
+    ".jpg", ".jpeg", ".png", ".gif", ".webp",
+    ".woff", ".woff2", ".otf", ".ttf",
+    ".mp3", ".mp4", ".m4a",
+})
+
+
+class _PolicyZipFile(zipfile.ZipFile):
+    """ZipFile that stores already-compressed media instead of deflating it (unless told otherwise)."""
+
+    def writestr(self, zinfo_or_arcname, data, compress_type=None, compresslevel=None):
+        if compress_type is None and isinstance(zinfo_or_arcname, str):
+            if PurePosixPath(zinfo_or_arcname).suffix.lower() in STORED_EXTENSIONS:
+                compress_type = zipfile.ZIP_STORED
+        super().writestr(zinfo_or_arcname, data, compress_type=compress_type, compresslevel=compresslevel)
+
+
+class _EpubWriter(epub.EpubWriter):
+    """ebooklib writer using the per-extension compression policy above."""
+
+    def write(self):
+        self.out = _PolicyZipFile(self.file_name, "w", zipfile.ZIP_DEFLATED, compresslevel=self.options["compresslevel"])
+        self.out.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+
+        self._write_container()
+        self._write_opf()
+        self._write_items()
+
+        self.out.close()
+
+
+def write_epub_file(output_path: Union[str, Path], book: epub.EpubBook, compresslevel: int = DEFAULT_COMPRESSLEVEL) -> None:
+    """
+    Serialize an EpubBook into memory and write it to output_path in a single write.
+    The file is written next to the target and renamed into place, so a failed run never
+    leaves a truncated EPUB behind (and output_path may safely equal the input path).
+    Raises OSError on write failures (ebooklib would otherwise only return False).
+    """
+    buf = io.BytesIO()
+    writer = _EpubWriter(buf, book, {"compresslevel": compresslevel, "raise_exceptions": True})
+    writer.process()
+    writer.write()
+
+    target = Path(output_path)
+    tmp_path = target.with_name(target.name + ".tmp")
+    try:
+        tmp_path.write_bytes(buf.getbuffer())
+        os.replace(tmp_path, target)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        raise
@@ -1,10 +1,17 @@
+import logging
 import os
 import time
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
+from scan2epub.utils.io import write_json
+
+logger = logging.getLogger("scan2epub.ocr")
+
+
 class PDFOCRProcessor:
     """
     Processes PDF files using Azure AI Content Understanding for OCR.
@@ -25,6 +32,20 @@ class PDFOCRProcessor:
             "Ocp-Apim-Subscription-Key": self.api_key,
             "Content-Type": "application/json"
         }
+
+        # One pooled session: the analyze POST and every status poll reuse the same TLS connection.
+        # Transport-level retries cover throttling/5xx on polls only (re-POSTing would start a second analysis).
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        retry = Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry))
         
     def _send_analyze_request(self, pdf_path: str) -> str:
         """
@@ -34,7 +55,7 @@ class PDFOCRProcessor:
         json_data = {"url": pdf_path}
         
         try:
-            response = requests.post(analyze_url, headers=self.headers, json=json_data)
+            response = self._session.post(analyze_url, json=json_data)
             response.raise_for_status()  # Raise an exception for HTTP errors
             operation_id = response.json().get("id")
             if not operation_id:
@@ -48,12 +69,17 @@ class PDFOCRProcessor:
         Polls for the analysis result using the operation ID.
         """
         result_url = f"{self.endpoint}/contentunderstanding/analyzerResults/{operation_id}?api-version={self.api_version}"
-        max_retries = 60  # Increased retries for async operation
-        retry_delay = 2   # Lower delay per user request
-        
-        for attempt in range(max_retries):
+        max_wait_s = 300  # Total polling budget
+        base_delay = 1.0  # Short documents finish quickly; poll soon, then back off
+        max_delay = 15.0
+
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            retry_delay = min(max_delay, base_delay * (1.5 ** (attempt - 1)))
             try:
-                response = requests.get(result_url, headers=self.headers)
+                response = self._session.get(result_url)
                 response.raise_for_status()
                 
                 result = response.json()
@@ -64,14 +90,19 @@ class PDFOCRProcessor:
                 elif status == "Failed":
                     raise Exception(f"Content Understanding analysis failed: {result.get('error', 'Unknown error')}")
                 elif status in ["Running", "NotStarted"]:
-                    elapsed_s = (attempt + 1) * retry_delay
-                    print(f"Analysis status: {status}. Retrying in {retry_delay} seconds (attempt {attempt + 1}/{max_retries}, elapsed {elapsed_s}s)...")
+                    retry_after = response.headers.get("Retry-After")
+                    if retry_after and retry_after.isdigit():
+                        retry_delay = min(max_delay, float(retry_after))
+                    elapsed_s = time.monotonic() - started
+                    if elapsed_s + retry_delay > max_wait_s:
+                        break
+                    logger.info(f"Analysis status: {status}. Retrying in {retry_delay:.1f} seconds (attempt {attempt}, elapsed {elapsed_s:.0f}s)...")
                     time.sleep(retry_delay)
                 else:
                     raise Exception(f"Unexpected analysis status: {status}")
             except requests.exceptions.RequestException as e:
-                print(f"Error polling for result (attempt {attempt + 1}/{max_retries}): {e}")
-                if attempt < max_retries - 1:
+                logger.warning(f"Error polling for result (attempt {attempt}): {e}")
+                if time.monotonic() - started + retry_delay <= max_wait_s:
                     time.sleep(retry_delay)
                 else:
                     raise
@@ -93,8 +124,7 @@ class PDFOCRProcessor:
 
         if self.debug_mode and self.debug_dir:
             debug_file_path = self.debug_dir / "azure_cu_result.json"
-            with open(debug_file_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
+            write_json(debug_file_path, result)
             print(f"🔍 DEBUG: Azure Content Understanding result saved to: {debug_file_path}")
 
         return result
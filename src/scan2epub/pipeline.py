@@ -1,15 +1,18 @@
 import logging
+import tempfile
 from pathlib import Path
-from typing import Optional, Tuple
-import json, time
+from typing import TYPE_CHECKING, Optional, Tuple
 
-from scan2epub.ocr.azure_cu import PDFOCRProcessor
-from scan2epub.epub.builder import EPUBBuilder
-from scan2epub.azure.storage import AzureStorageHandler
 from scan2epub.utils.errors import OCRError, EPUBError
 from scan2epub.config import AppConfig  # typed config
-from scan2epub.translate.translator import AzureTranslator
-from scan2epub.epub.translator import EPUBTranslator
+from scan2epub.utils.status import StatusWriter
+
+# Stage implementations (Azure SDKs, ebooklib, requests) are imported inside each run_* function,
+# so CLI startup and unrelated commands do not pay for them
+if TYPE_CHECKING:
+    from scan2epub.azure.storage import AzureStorageHandler
+
+logger = logging.getLogger("scan2epub.pipeline")
 
 
 def run_ocr_to_epub(
@@ -25,22 +28,15 @@ def run_ocr_to_epub(
     Run OCR on a PDF (local file or URL) and create an EPUB with raw OCR text.
     Returns (output_epub_path, interim_debug_file_or_None)
     """
-    logger = logging.getLogger("scan2epub.pipeline")
-    storage_handler: Optional[AzureStorageHandler] = None
+    from scan2epub.ocr.azure_cu import PDFOCRProcessor
+    from scan2epub.epub.builder import EPUBBuilder
+    from scan2epub.azure.storage import AzureStorageHandler
+
+    storage_handler: Optional["AzureStorageHandler"] = None
     interim_file: Optional[str] = None
 
-    def _status(event: str, **extras):
-        if not status_file:
-            return
-        try:
-            status_file.parent.mkdir(parents=True, exist_ok=True)
-            with status_file.open("a", encoding="utf-8") as f:
-                payload = {"t": time.time(), "event": "pipeline_stage", "stage": event}
-                if extras:
-                    payload.update(extras)
-                f.write(json.dumps(payload, ensure_ascii=False) + "\n")
-        except Exception:
-            pass
+    status = StatusWriter(status_file, event="pipeline_stage")
+    _status = status.emit
 
     try:
         _status("ocr_start", input=input_path, output=str(output_epub))
@@ -84,6 +80,7 @@ def run_ocr_to_epub(
                 _status("upload_cleanup_done")
             except Exception:
                 pass
+        status.close()
 
 
 def run_cleanup(
@@ -94,13 +91,23 @@ def run_cleanup(
     save_interim: bool = False,
     debug_dir: Optional[Path] = None,
     status_file: Optional[Path] = None,
+    use_batch_api: bool = False,
+    stream_llm: bool = False,
+    force_llm: bool = False,
+    cache_dir: Optional[Path] = None,
+    max_concurrency: int = 4,
 ) -> str:
     """
     Clean an EPUB (OCR artifacts) with Azure OpenAI and write a cleaned EPUB.
+    With use_batch_api, all chunks are submitted as one (cheaper, slower) Batch API job;
+    stream_llm streams synchronous responses for live progress; force_llm also sends chunks
+    without detected OCR artifacts to the LLM. With cache_dir, cleaned chunks are stored on disk
+    and reused by later runs with the same deployment and prompt. max_concurrency bounds the
+    number of LLM requests in flight at once.
     Returns output_epub_path.
     """
     # Import here to avoid circular import and to keep dependency localized
-    from scan2epub.epub.cleaner import EPUBOCRCleaner  # type: ignore
+    from scan2epub.epub.cleaner import EPUBOCRCleaner, CleanerRuntimeConfig  # type: ignore
 
     # Pass typed Azure OpenAI config into the cleaner (falls back to env if None)
     cleaner = EPUBOCRCleaner(
@@ -108,6 +115,13 @@ def run_cleanup(
         debug_dir=debug_dir,
         azure_openai_cfg=cfg.azure_openai,
         status_file=status_file,
+        runtime_cfg=CleanerRuntimeConfig(
+            use_batch_api=use_batch_api,
+            stream_responses=stream_llm,
+            force_llm=force_llm,
+            cache_dir=cache_dir,
+            max_concurrency=max_concurrency,
+        ),
     )
     cleaner.clean_epub(input_epub, output_epub, debug=debug, save_interim=save_interim)
     return output_epub
@@ -124,11 +138,16 @@ def run_translate(
     status_file: Optional[Path] = None,
     allow_noop: Optional[bool] = None,
     min_changed_ratio: Optional[float] = None,
+    cache_dir: Optional[Path] = None,
 ) -> str:
     """
     Translate an EPUB using the configured translator and write the translated EPUB.
+    With cache_dir, translated paragraphs are stored on disk and reused by later runs.
     Returns output_epub_path.
     """
+    from scan2epub.translate.translator import AzureTranslator
+    from scan2epub.epub.translator import EPUBTranslator
+
     # Determine provider (for now only Azure Translator is implemented)
     provider_name = (provider or "").lower() or cfg.translator.provider
     if provider_name in ("azure_translator", "azure", "auto"):
@@ -155,6 +174,7 @@ def run_translate(
         status_file=status_file,
         allow_noop=(allow_noop if allow_noop is not None else cfg.translator.allow_noop),
         min_changed_ratio=(min_changed_ratio if min_changed_ratio is not None else cfg.translator.min_changed_ratio),
+        cache_dir=cache_dir,
     )
     return engine.translate_epub(
         input_epub=input_epub,
@@ -178,6 +198,11 @@ def run_full_pipeline(
     translate_provider: Optional[str] = None,
     allow_noop_translation: Optional[bool] = None,
     min_changed_ratio: Optional[float] = None,
+    use_batch_api: bool = False,
+    stream_llm: bool = False,
+    force_llm: bool = False,
+    cache_dir: Optional[Path] = None,
+    max_concurrency: int = 4,
 ) -> str:
     """
     Full pipeline: PDF -> OCR -> interim EPUB -> cleanup -> final EPUB.
@@ -185,89 +210,83 @@ def run_full_pipeline(
     """
     # Step 1: OCR to interim EPUB
     output_path_obj = Path(output_epub)
-    interim_epub_path = output_path_obj.with_stem(output_path_obj.stem + "_interim_ocr").with_suffix(".epub")
+    keep_interim = bool(debug and debug_dir)
+    # Interim EPUBs only live next to the output when they are kept for debugging; otherwise
+    # they go to a temp dir, removed when the pipeline returns or raises
+    interim_tmp = None if keep_interim else tempfile.TemporaryDirectory(prefix="scan2epub_")
+    interim_dir = output_path_obj.parent if interim_tmp is None else Path(interim_tmp.name)
+    interim_epub_path = interim_dir / f"{output_path_obj.stem}_interim_ocr.epub"
 
-    # Pipeline-level status helper
-    def _status(event: str, **extras):
-        if not status_file:
-            return
-        try:
-            status_file.parent.mkdir(parents=True, exist_ok=True)
-            with status_file.open("a", encoding="utf-8") as f:
-                payload = {"t": time.time(), "event": "pipeline_stage", "stage": event}
-                if extras:
-                    payload.update(extras)
-                f.write(json.dumps(payload, ensure_ascii=False) + "\n")
-        except Exception:
-            pass
+    # Pipeline-level status helper (one handle for the whole run)
+    status = StatusWriter(status_file, event="pipeline_stage")
+    _status = status.emit
 
-    _status("pipeline_start", input=input_pdf, output=output_epub)
-    run_ocr_to_epub(
-        cfg=cfg,
-        input_path=input_pdf,
-        output_epub=str(interim_epub_path),
-        language=language,
-        debug=debug,
-        debug_dir=debug_dir,
-        status_file=status_file,
-    )
-    _status("ocr_done", interim=str(interim_epub_path))
-
-    # Step 2: Cleanup interim EPUB to final
-    _status("cleanup_start")
-    # Decide cleanup output target: direct to final unless translation is requested
-    interim_clean_epub_path = output_path_obj.with_stem(output_path_obj.stem + "_interim_clean").with_suffix(".epub")
-    cleanup_target = output_epub if not translate_to else str(interim_clean_epub_path)
-    final_path = run_cleanup(
-        cfg=cfg,
-        input_epub=str(interim_epub_path),
-        output_epub=cleanup_target,
-        debug=debug,
-        save_interim=save_interim,
-        debug_dir=debug_dir,
-        status_file=status_file,
-    )
-    _status("cleanup_done", final=cleanup_target)
+    try:
+        _status("pipeline_start", input=input_pdf, output=output_epub)
+        run_ocr_to_epub(
+            cfg=cfg,
+            input_path=input_pdf,
+            output_epub=str(interim_epub_path),
+            language=language,
+            debug=debug,
+            debug_dir=debug_dir,
+            status_file=status_file,
+        )
+        _status("ocr_done", interim=str(interim_epub_path))
 
-    # Optional Step 3: Translate cleaned EPUB to target language
-    if translate_to:
-        _status("translate_start", to=translate_to)
-        final_path = run_translate(
+        # Step 2: Cleanup interim EPUB to final
+        _status("cleanup_start")
+        # Decide cleanup output target: direct to final unless translation is requested
+        interim_clean_epub_path = interim_dir / f"{output_path_obj.stem}_interim_clean.epub"
+        cleanup_target = output_epub if not translate_to else str(interim_clean_epub_path)
+        final_path = run_cleanup(
             cfg=cfg,
-            input_epub=cleanup_target,
-            output_epub=output_epub,
-            to_lang=translate_to,
-            provider=translate_provider,
+            input_epub=str(interim_epub_path),
+            output_epub=cleanup_target,
             debug=debug,
+            save_interim=save_interim,
             debug_dir=debug_dir,
             status_file=status_file,
-            allow_noop=allow_noop_translation,
-            min_changed_ratio=min_changed_ratio,
+            use_batch_api=use_batch_api,
+            stream_llm=stream_llm,
+            force_llm=force_llm,
+            cache_dir=cache_dir,
+            max_concurrency=max_concurrency,
         )
-        _status("translate_done", final=output_epub)
-        # Cleanup interim cleaned file if not debugging
-        if not (debug and debug_dir):
+        _status("cleanup_done", final=cleanup_target)
+
+        # Optional Step 3: Translate cleaned EPUB to target language
+        if translate_to:
+            _status("translate_start", to=translate_to)
+            final_path = run_translate(
+                cfg=cfg,
+                input_epub=cleanup_target,
+                output_epub=output_epub,
+                to_lang=translate_to,
+                provider=translate_provider,
+                debug=debug,
+                debug_dir=debug_dir,
+                status_file=status_file,
+                allow_noop=allow_noop_translation,
+                min_changed_ratio=min_changed_ratio,
+                cache_dir=cache_dir,
+            )
+            _status("translate_done", final=output_epub)
+
+        # Move or remove interim
+        if keep_interim:
+            # Keep interim in debug dir
+            target = debug_dir / Path(interim_epub_path).name
             try:
-                Path(cleanup_target).unlink(missing_ok=True)
-                logging.getLogger("scan2epub.pipeline").info(f"Cleaned up interim file: {cleanup_target}")
+                Path(interim_epub_path).replace(target)
+                logger.info(f"Moved interim file to debug directory: {target}")
             except Exception:
                 pass
 
-    # Move or remove interim
-    if debug and debug_dir:
-        # Keep interim in debug dir
-        target = debug_dir / Path(interim_epub_path).name
-        try:
-            Path(interim_epub_path).replace(target)
-            logging.getLogger("scan2epub.pipeline").info(f"Moved interim file to debug directory: {target}")
-        except Exception:
-            pass
-    else:
-        try:
-            Path(interim_epub_path).unlink(missing_ok=True)
-            logging.getLogger("scan2epub.pipeline").info(f"Cleaned up interim file: {interim_epub_path}")
-        except Exception:
-            pass
-
-    _status("pipeline_done", result=final_path)
-    return final_path
+        _status("pipeline_done", result=final_path)
+        return final_path
+    finally:
+        if interim_tmp is not None:
+            interim_tmp.cleanup()
+            logger.info(f"Cleaned up interim files in: {interim_dir}")
+        status.close()
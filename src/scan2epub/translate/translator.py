@@ -1,13 +1,24 @@
 import logging
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Protocol, runtime_checkable, Iterable
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from scan2epub.utils.errors import TranslationError
+from scan2epub.utils.io import json_bytes
 
 logger = logging.getLogger("scan2epub.translate")
 
+# Throttling and server-side failures are worth retrying; other 4xx responses will not change
+_RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+# Bad credentials fail every batch the same way, so they abort the run instead of degrading
+_AUTH_FAILURE_STATUS = frozenset({401, 403})
+# Upper bound for a Retry-After wait and for the exponential part of the backoff (before jitter)
+_MAX_BACKOFF_S = 30.0
+
 
 @runtime_checkable
 class ITranslator(Protocol):
@@ -20,6 +31,10 @@ class ITranslator(Protocol):
         ...
 
 
+class _AuthFailure(TranslationError):
+    """Raised by AzureTranslator._translate_batch for 401/403; never retried."""
+
+
 class AzureTranslator(ITranslator):
     """
     Microsoft Translator Text API (Cognitive Services) implementation.
@@ -43,6 +58,7 @@ class AzureTranslator(ITranslator):
         timeout_s: int = 30,
         max_retries: int = 3,
         retry_delay_s: int = 2,
+        max_parallel: int = 1,
     ) -> None:
         if not endpoint or not api_key:
             raise TranslationError("AzureTranslator requires endpoint and api_key")
@@ -50,19 +66,28 @@ class AzureTranslator(ITranslator):
         self.api_key = api_key
         self.region = region
         self.api_version = api_version
-        self.session = session or requests.Session()
         self.timeout_s = timeout_s
         self.max_retries = max_retries
         self.retry_delay_s = retry_delay_s
-
-    def _headers(self) -> dict:
-        headers = {
+        # Request batches in flight within one translate_text() call. Sequential by default: the EPUB
+        # pipeline parallelizes in EPUBTranslator instead. Only for direct callers sending large inputs.
+        self.max_parallel = max(1, max_parallel)
+        if session is None:
+            # One warm keep-alive connection per in-flight request, whichever layer issues them
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=16))
+        self.session = session
+        # Static per instance: built once, not per request
+        self._url = f"{self.endpoint}/translate"
+        self._request_headers = {
             "Ocp-Apim-Subscription-Key": self.api_key,
             "Content-Type": "application/json; charset=utf-8",
         }
         if self.region:
-            headers["Ocp-Apim-Subscription-Region"] = self.region
-        return headers
+            self._request_headers["Ocp-Apim-Subscription-Region"] = self.region
+
+    def _headers(self) -> dict:
+        return self._request_headers
 
     def _batch_segments(self, segments: List[str]) -> Iterable[List[str]]:
         """
@@ -85,12 +110,84 @@ class AzureTranslator(ITranslator):
         if batch:
             yield batch
 
+    def _translate_batch(self, url: str, params: dict, batch_idx: int, batch: List[str]) -> List[str]:
+        """
+        Translate one batch with retries; on final failure the original segments are returned.
+        Only throttling/server errors are retried (honoring Retry-After); 401/403 raise TranslationError.
+        """
+        # Serialized once for all attempts; Content-Type is already set in the request headers
+        body = json_bytes([{"Text": s} for s in batch])
+        attempt = 0
+        last_err: Optional[str] = None
+        while attempt < self.max_retries:
+            attempt += 1
+            retryable = True
+            retry_after: Optional[float] = None
+            try:
+                resp = self.session.post(
+                    url,
+                    params=params,
+                    data=body,
+                    headers=self._headers(),
+                    timeout=self.timeout_s,
+                )
+                if resp.status_code >= 400:
+                    # include response body for diagnostics
+                    try:
+                        err_body = resp.json()
+                    except Exception:
+                        err_body = resp.text
+                    message = f"Azure Translator HTTP {resp.status_code}: {err_body}"
+                    if resp.status_code in _AUTH_FAILURE_STATUS:
+                        raise _AuthFailure(message)
+                    retryable = resp.status_code in _RETRYABLE_STATUS
+                    header = resp.headers.get("Retry-After")
+                    if header and header.isdigit():
+                        # A bogus or huge hint must not stall the run
+                        retry_after = min(float(header), _MAX_BACKOFF_S)
+                    raise TranslationError(message)
+                data = resp.json()
+                # Response is a list with same length as body; each element has 'translations' list
+                # Map to first translation text per item
+                batch_out: List[str] = []
+                for i, item in enumerate(data):
+                    translations = item.get("translations", [])
+                    if not translations:
+                        # preserve index alignment; fallback to original if missing
+                        logger.warning(f"No translation returned for item {i} in batch {batch_idx}; using original")
+                        batch_out.append(batch[i])
+                    else:
+                        batch_out.append((translations[0].get("text") or "").strip())
+                return batch_out
+            except _AuthFailure:
+                raise
+            except Exception as e:
+                last_err = str(e)
+                if not retryable:
+                    break
+                if attempt < self.max_retries:
+                    # Honor the service's throttle hint; without one, back off exponentially with
+                    # jitter so parallel batches do not retry in lock-step
+                    if retry_after is not None:
+                        backoff = retry_after
+                    else:
+                        backoff = min(self.retry_delay_s * 2 ** (attempt - 1), _MAX_BACKOFF_S) * (0.5 + random.random())
+                    logger.warning(
+                        f"Azure Translator batch {batch_idx} failed (attempt {attempt}/{self.max_retries}): {last_err}. Retrying in {backoff:.1f}s"
+                    )
+                    time.sleep(backoff)
+        # On final failure, degrade gracefully: use originals for this batch
+        logger.error(
+            f"Azure Translator batch {batch_idx} failed after {attempt} attempt(s): {last_err}. Using original text for this batch."
+        )
+        return list(batch)
+
     def preflight_check(self, to_lang: str, from_lang: Optional[str] = None) -> None:
         """
         Lightweight availability/auth check. Performs a single tiny translation request with NO retries.
         Raises TranslationError on any non-2xx or unexpected response shape.
         """
-        url = f"{self.endpoint}/translate"
+        url = self._url
         params = {"api-version": self.api_version, "to": (to_lang or "en")}
         if from_lang:
             params["from"] = from_lang
@@ -125,78 +222,47 @@ class AzureTranslator(ITranslator):
         if not to_lang or len(to_lang) < 2:
             raise TranslationError("Target language code (to_lang) must be provided")
 
-        url = f"{self.endpoint}/translate"
+        url = self._url
         params = {"api-version": self.api_version, "to": to_lang}
         if from_lang:
             params["from"] = from_lang
 
-        translated: List[str] = []
-        for batch_idx, batch in enumerate(self._batch_segments(segments), start=1):
-            body = [{"Text": s} for s in batch]
-            attempt = 0
-            last_err: Optional[str] = None
-            while attempt < self.max_retries:
-                attempt += 1
-                try:
-                    resp = self.session.post(
-                        url,
-                        params=params,
-                        json=body,
-                        headers=self._headers(),
-                        timeout=self.timeout_s,
-                    )
-                    if resp.status_code >= 400:
-                        # include response body for diagnostics
-                        try:
-                            err_body = resp.json()
-                        except Exception:
-                            err_body = resp.text
-                        raise TranslationError(
-                            f"Azure Translator HTTP {resp.status_code}: {err_body}"
-                        )
-                    data = resp.json()
-                    # Response is a list with same length as body; each element has 'translations' list
-                    # Map to first translation text per item
-                    batch_out: List[str] = []
-                    for i, item in enumerate(data):
-                        translations = item.get("translations", [])
-                        if not translations:
-                            # preserve index alignment; fallback to original if missing
-                            logger.warning(f"No translation returned for item {i} in batch {batch_idx}; using original")
-                            batch_out.append(batch[i])
-                        else:
-                            batch_out.append((translations[0].get("text") or "").strip())
-                    translated.extend(batch_out)
-                    break  # batch succeeded
-                except Exception as e:
-                    last_err = str(e)
-                    if attempt < self.max_retries:
-                        backoff = self.retry_delay_s * attempt
-                        logger.warning(
-                            f"Azure Translator batch {batch_idx} failed (attempt {attempt}/{self.max_retries}): {last_err}. Retrying in {backoff}s"
-                        )
-                        time.sleep(backoff)
-                    else:
-                        # On final failure, degrade gracefully: append originals for this batch
-                        logger.error(
-                            f"Azure Translator batch {batch_idx} failed after retries: {last_err}. Using original text for this batch."
-                        )
-                        translated.extend(batch)
-                        break
+        # Each distinct segment is sent once (repeated headings, "* * *", boilerplate);
+        # empty and whitespace-only segments are never sent and come back unchanged
+        unique = list(dict.fromkeys(s for s in segments if s and not s.isspace()))
+        if not unique:
+            return list(segments)
+
+        # Batches are independent requests: overlap their round-trips on the shared session, keeping order
+        batches = list(self._batch_segments(unique))
+        workers = min(self.max_parallel, len(batches))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(
+                    lambda idx, batch: self._translate_batch(url, params, idx, batch),
+                    range(1, len(batches) + 1),
+                    batches,
+                ))
+        else:
+            results = [self._translate_batch(url, params, i, batch) for i, batch in enumerate(batches, start=1)]
+        translated: List[str] = [t for out in results for t in out]
 
         # Ensure alignment
-        if len(translated) != len(segments):
+        if len(translated) != len(unique):
             # This should not happen, but guard against API anomalies
             logger.error(
-                f"Translated segments count mismatch: expected {len(segments)}, got {len(translated)}. Truncating/patching."
+                f"Translated segments count mismatch: expected {len(unique)}, got {len(translated)}. Truncating/patching."
             )
             # Patch by trimming or extending with originals
-            if len(translated) > len(segments):
-                translated = translated[: len(segments)]
+            if len(translated) > len(unique):
+                translated = translated[: len(unique)]
             else:
-                translated.extend(segments[len(translated) :])
+                translated.extend(unique[len(translated) :])
 
-        return translated
+        if len(unique) == len(segments):
+            return translated
+        by_segment = dict(zip(unique, translated))
+        return [by_segment.get(s, s) for s in segments]
 
 
 __all__ = ["ITranslator", "AzureTranslator"]
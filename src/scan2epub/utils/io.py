@@ -1,13 +1,86 @@
+import json
+import os
+import shutil
+import sys
 from pathlib import Path
+from typing import Any, Union
+
+try:  # Optional accelerator; stdlib json is used when missing
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 
 def get_unique_debug_dir(base_path: Path) -> Path:
     """
-    Generates a unique directory path for debug files.
-    If the base path exists, appends a counter (e.g., _1, _2) until a unique path is found.
+    Creates and returns a unique directory for debug files.
+    If the base path is taken, appends a counter (e.g., _1, _2) until mkdir succeeds, so the
+    returned directory always belongs to the caller, even with concurrent runs.
     """
     debug_dir = base_path
     counter = 0
-    while debug_dir.exists():
-        counter += 1
-        debug_dir = Path(f"{base_path}_{counter}")
-    return debug_dir
+    while True:
+        try:
+            debug_dir.mkdir(parents=True)
+            return debug_dir
+        except FileExistsError:
+            counter += 1
+            debug_dir = Path(f"{base_path}_{counter}")
+
+
+# Linux ioctl asking the filesystem for a copy-on-write clone of a whole file (Btrfs, XFS, bcachefs, ...)
+_FICLONE = 0x40049409
+
+
+def clone_file(src: Union[str, Path], dst: Union[str, Path]) -> None:
+    """
+    Copy src to dst with metadata, like shutil.copy2, but as an O(1) copy-on-write clone
+    where the filesystem supports it; elsewhere it falls back to a regular copy.
+    (Hard links are deliberately not used: in-place edits of src would change the copy too.)
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            import fcntl
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            pass  # not supported here (ext4, tmpfs, cross-device...): copy2 overwrites dst
+    shutil.copy2(src, dst)
+
+
+def write_json(path: Union[str, Path], obj: Any, indent: bool = True) -> None:
+    """
+    Write obj as UTF-8 JSON (non-ASCII kept as-is), indented unless indent=False.
+    Uses orjson when installed, which is several times faster on large Hungarian text payloads.
+    The file is written next to path and renamed into place, so an interrupted run never leaves
+    a truncated checkpoint behind.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        data = orjson.dumps(obj, default=str, option=option)
+    else:
+        data = json.dumps(obj, ensure_ascii=False, indent=2 if indent else None, default=str).encode("utf-8")
+    target = Path(path)
+    tmp_path = target.with_name(target.name + ".tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, target)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def json_bytes(obj: Any) -> bytes:
+    """Serialize obj as compact UTF-8 JSON bytes (e.g. an HTTP request body); orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def json_line(obj: Any) -> bytes:
+    """Serialize obj as one compact UTF-8 JSON line (with trailing newline) for JSONL logs."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj, ensure_ascii=False, default=str) + "\n").encode("utf-8")
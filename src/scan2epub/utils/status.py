@@ -0,0 +1,53 @@
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from scan2epub.utils.io import json_line
+
+
+class StatusWriter:
+    """
+    Appends JSONL status events ({"t", "event", "stage", **extras}) to a status file.
+
+    The file is opened once, on the first event, and every line goes out in a single
+    unbuffered write, so tailing consumers see it immediately. Safe to share between threads.
+    With path=None every call is a no-op; write errors are swallowed (status is best-effort).
+    """
+
+    def __init__(self, path: Optional[Path], event: str):
+        self.path = Path(path) if path else None
+        self.event = event
+        self._lock = threading.Lock()
+        self._fh = None
+
+    def emit(self, stage: str, **extras: Any) -> None:
+        if self.path is None:
+            return
+        try:
+            payload = {"t": time.time(), "event": self.event, "stage": stage}
+            if extras:
+                payload.update(extras)
+            line = json_line(payload)
+            with self._lock:
+                if self._fh is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._fh = self.path.open("ab", buffering=0)
+                self._fh.write(line)
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        """Release the file handle; a later event simply reopens it."""
+        with self._lock:
+            if self._fh is not None:
+                try:
+                    self._fh.close()
+                finally:
+                    self._fh = None
+
+    def __enter__(self) -> "StatusWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
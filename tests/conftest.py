@@ -1,5 +1,12 @@
+import random
 import sys
+import threading
+import time
 from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
 
 def pytest_configure():
     """
@@ -10,3 +17,58 @@ def pytest_configure():
     src_str = str(src_path)
     if src_path.exists() and src_str not in sys.path:
         sys.path.insert(0, src_str)
+
+
+class FakeChatClient:
+    """
+    Fake OpenAI chat client: answers with the uppercased user message.
+
+    Counts calls and peak concurrency, optionally sleeps a random delay in [0, delay] seconds,
+    and streams the answer as delta events when called with stream=True. The first `truncate`
+    calls stop halfway with finish_reason="length", like a reply that hit max_tokens.
+    """
+
+    def __init__(self, delay: float = 0.0, truncate: int = 0):
+        self.delay = delay
+        self.truncate = truncate
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.in_flight = 0
+        self.peak = 0
+        self.max_tokens: list = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, temperature, max_tokens, stream=False):
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+            self.max_tokens.append(max_tokens)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        if self.delay:
+            time.sleep(random.uniform(0, self.delay))
+        with self.lock:
+            self.in_flight -= 1
+
+        content = messages[-1]["content"].upper()
+        finish_reason = "stop"
+        if call <= self.truncate:
+            content, finish_reason = content[: len(content) // 2], "length"
+        if stream:
+            return self._stream(content, finish_reason)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason=finish_reason)], usage=None)
+
+    @staticmethod
+    def _stream(content, finish_reason):
+        pieces = [content[i:i + 7] for i in range(0, len(content), 7)]
+        for n, piece in enumerate(pieces, start=1):
+            delta = SimpleNamespace(content=piece)
+            done = finish_reason if n == len(pieces) else None
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=done)], usage=None)
+
+
+@pytest.fixture
+def fake_chat_client():
+    """Factory for FakeChatClient (keyword arguments: delay, truncate)."""
+    return FakeChatClient
@@ -0,0 +1,12 @@
+from scan2epub.epub.cleaner import chunk_text
+
+
+def test_oversized_paragraph_never_splits_after_abbreviation_or_ordinal():
+    sentence = "Dr. Kovács 1848. március 15-én J. Nagy úrral érkezett, pl. gyalog, kb. délben. "
+    paragraph = sentence * 40
+
+    chunks = chunk_text(paragraph, 200)
+
+    assert len(chunks) > 1
+    assert all(c.endswith("délben.") for c in chunks)
+    assert " ".join(chunks) == paragraph.strip()
@@ -0,0 +1,93 @@
+import json
+from types import SimpleNamespace
+
+from scan2epub.config import AzureOpenAIConfig
+from scan2epub.epub.cleaner import EPUBOCRCleaner, clean_chunks_batch, predict_output_tokens
+
+
+class FakeBatchService:
+    """Fake files/batches API: completes after `polls` status polls; `fail` custom_ids come back with HTTP 500."""
+
+    def __init__(self, polls: int = 1, fail=()):
+        self.polls = polls
+        self.fail = set(fail)
+        self.requests = []
+        self.retrieves = 0
+        self.cancelled = []
+        self.files = SimpleNamespace(create=self._upload, content=self._download)
+        self.batches = SimpleNamespace(create=self._submit, retrieve=self._retrieve, cancel=self.cancelled.append)
+
+    def attach(self, client):
+        client.files = self.files
+        client.batches = self.batches
+        return client
+
+    def _upload(self, file, purpose):
+        self.requests = [json.loads(line) for line in file[1].decode("utf-8").splitlines()]
+        return SimpleNamespace(id="file-in")
+
+    def _submit(self, input_file_id, endpoint, completion_window):
+        return SimpleNamespace(id="batch-1", status="in_progress", output_file_id=None)
+
+    def _retrieve(self, batch_id):
+        self.retrieves += 1
+        if self.retrieves < self.polls:
+            return SimpleNamespace(id=batch_id, status="in_progress", output_file_id=None)
+        return SimpleNamespace(id=batch_id, status="completed", output_file_id="file-out")
+
+    def _download(self, file_id):
+        lines = []
+        for request in self.requests:
+            if request["custom_id"] in self.fail:
+                response = {"status_code": 500, "body": {}}
+            else:
+                content = request["body"]["messages"][-1]["content"].upper()
+                response = {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}}
+            lines.append(json.dumps({"custom_id": request["custom_id"], "response": response}))
+        return SimpleNamespace(text="\n".join(lines))
+
+
+def _no_sleep(monkeypatch):
+    monkeypatch.setattr("scan2epub.epub.cleaner.time.sleep", lambda s: None)
+
+
+def test_batch_job_is_polled_until_completed(monkeypatch, fake_chat_client):
+    _no_sleep(monkeypatch)
+    service = FakeBatchService(polls=3)
+    chunks = [("a", "első\n\n1\n\nrész"), ("b", "második\n\n2\n\nrész")]
+
+    results = clean_chunks_batch(chunks, service.attach(fake_chat_client()), "dep", 0.1, 4000, timeout_s=600)
+
+    assert results == {"a": "ELSŐ\n\n1\n\nRÉSZ", "b": "MÁSODIK\n\n2\n\nRÉSZ"}
+    assert service.retrieves == 3
+    assert [r["body"]["max_tokens"] for r in service.requests] == [predict_output_tokens(c, 4000) for _, c in chunks]
+
+
+def test_batch_timeout_cancels_the_job(monkeypatch, fake_chat_client):
+    _no_sleep(monkeypatch)
+    service = FakeBatchService()
+
+    results = clean_chunks_batch([("a", "első\n\n1\n\nrész")], service.attach(fake_chat_client()), "dep", 0.1, 4000, timeout_s=0)
+
+    assert results is None
+    assert service.cancelled == ["batch-1"]
+
+
+def test_batch_api_selects_chunks_like_sync_cleanup(monkeypatch, fake_chat_client):
+    _no_sleep(monkeypatch)
+    clean_text = "Ez egy hosszú, teljesen tiszta mondat, amelyben nincs semmi hiba."
+    texts = ["alma\n\n12\n\nkörte", clean_text, "alma\n\n12\n\nkörte", "szilva\n\n13\n\nbarack"]
+    # The last text's request fails inside the job and is cleaned synchronously instead
+    service = FakeBatchService(fail={"chunk_4"})
+    client = service.attach(fake_chat_client())
+    cleaner = EPUBOCRCleaner(
+        azure_openai_cfg=AzureOpenAIConfig(endpoint="https://x", api_key="k", api_version="v", deployment="dep"),
+        client_factory=lambda cfg: client,
+    )
+
+    cleaned = cleaner.clean_texts_with_batch_api(texts)
+
+    # Artifact-free text is not sent; the repeated text is sent once
+    assert [r["custom_id"] for r in service.requests] == ["chunk_1", "chunk_4"]
+    assert client.calls == 1
+    assert cleaned == ["ALMA\n\n12\n\nKÖRTE", clean_text, "ALMA\n\n12\n\nKÖRTE", "SZILVA\n\n13\n\nBARACK"]
@@ -0,0 +1,12 @@
+from scan2epub.epub.cleaner import clean_chunks
+
+
+def test_parallel_cleanup_keeps_chunk_order(fake_chat_client):
+    # Every chunk contains a page-number line, so analyze() sends all of them to the LLM
+    chunks = [f"chunk {i} text\n\n{i + 1}\n\nmore" for i in range(12)]
+    client = fake_chat_client(delay=0.05)
+
+    cleaned = clean_chunks(chunks, client, "dep", 0.1, 4000, max_concurrency=4)
+
+    assert cleaned == [c.upper() for c in chunks]
+    assert 1 < client.peak <= 4
@@ -0,0 +1,19 @@
+from scan2epub.epub.cleaner import clean_chunks
+
+
+def test_streamed_responses_are_reassembled(fake_chat_client):
+    chunks = [f"chunk {i} text\n\n{i + 1}\n\nmore" for i in range(3)]
+    client = fake_chat_client()
+
+    assert clean_chunks(chunks, client, "dep", 0.1, 4000, stream=True) == [c.upper() for c in chunks]
+    assert client.calls == 3
+
+
+def test_truncated_stream_is_retried_with_a_doubled_budget(fake_chat_client):
+    chunk = "a vonat lassan gördült be az állomásra\n\n42\n\n" * 3
+    client = fake_chat_client(truncate=1)
+
+    cleaned = clean_chunks([chunk], client, "dep", 0.1, 4000, stream=True)
+
+    assert cleaned == [chunk.upper().strip()]
+    assert client.max_tokens == [512, 1024]
@@ -0,0 +1,13 @@
+import pytest
+
+from scan2epub.epub.cleaner import _CLEANUP_RULES
+
+
+def test_cleanup_prompt_reaches_the_prompt_cache_threshold():
+    tiktoken = pytest.importorskip("tiktoken")
+    try:
+        enc = tiktoken.get_encoding("o200k_base")
+    except Exception:
+        pytest.skip("o200k_base encoding not available (offline)")
+    # Azure only caches prompt prefixes of 1024 tokens or more; single and marshaled prompts share this one
+    assert len(enc.encode(_CLEANUP_RULES)) >= 1024
@@ -0,0 +1,50 @@
+import zipfile
+from pathlib import Path
+
+import pytest
+from ebooklib import epub
+
+from scan2epub.epub.writer import write_epub_file
+
+
+def _book_with_image() -> epub.EpubBook:
+    book = epub.EpubBook()
+    book.set_identifier("test-book")
+    book.set_title("Próba")
+    book.set_language("hu")
+    chapter = epub.EpubHtml(title="Első", file_name="chap_1.xhtml", lang="hu")
+    chapter.content = "<html><body><p>" + "Szöveg. " * 200 + "</p></body></html>"
+    book.add_item(chapter)
+    book.add_item(epub.EpubItem(uid="cover", file_name="images/cover.png", media_type="image/png", content=b"\x89PNG" + bytes(4096)))
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    book.spine = ["nav", chapter]
+    return book
+
+
+def test_media_is_stored_text_is_deflated_and_no_tmp_is_left(tmp_path: Path):
+    output = tmp_path / "book.epub"
+    output.write_bytes(b"previous run")
+
+    write_epub_file(output, _book_with_image())
+
+    with zipfile.ZipFile(output) as zf:
+        infos = zf.infolist()
+        by_name = {info.filename: info for info in infos}
+        assert infos[0].filename == "mimetype"
+        assert infos[0].compress_type == zipfile.ZIP_STORED
+        assert by_name["EPUB/images/cover.png"].compress_type == zipfile.ZIP_STORED
+        assert by_name["EPUB/chap_1.xhtml"].compress_type == zipfile.ZIP_DEFLATED
+        assert zf.testzip() is None
+    assert [p.name for p in tmp_path.iterdir()] == ["book.epub"]
+
+
+def test_failed_replace_removes_the_tmp_file(tmp_path: Path):
+    # os.replace cannot put a file over a directory
+    output = tmp_path / "book.epub"
+    output.mkdir()
+
+    with pytest.raises(OSError):
+        write_epub_file(output, _book_with_image())
+
+    assert [p.name for p in tmp_path.iterdir()] == ["book.epub"]
@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import pytest
+
+from scan2epub.epub.cleaner import clean_chunks, chunk_key
+from scan2epub.epub.llm_cache import LLMCache
+from scan2epub.utils.errors import TranslationError
+
+
+def test_cache_persists_across_instances_and_namespaces(tmp_path: Path):
+    key = chunk_key("szöveg")
+    LLMCache(tmp_path, "dep|0.1|abc")[key] = "SZÖVEG"
+
+    assert LLMCache(tmp_path, "dep|0.1|abc").get(key) == "SZÖVEG"
+    assert key not in LLMCache(tmp_path, "other-deployment|0.1|abc")
+
+
+def test_second_run_is_served_from_disk(tmp_path: Path, fake_chat_client):
+    chunks = [f"chunk {i} text\n\n{i + 1}\n\nmore" for i in range(3)]
+
+    first = fake_chat_client()
+    cleaned = clean_chunks(chunks, first, "dep", 0.1, 4000, cache=LLMCache(tmp_path, "ns"))
+    second = fake_chat_client()
+    again = clean_chunks(chunks, second, "dep", 0.1, 4000, cache=LLMCache(tmp_path, "ns"))
+
+    assert first.calls == 3
+    assert second.calls == 0
+    assert again == cleaned == [c.upper() for c in chunks]
+
+
+def test_chunks_are_cached_before_an_interruption(tmp_path: Path, fake_chat_client):
+    class Interrupted(BaseException):
+        pass
+
+    class InterruptingClient(fake_chat_client):
+        def create(self, *args, **kwargs):
+            if self.calls == 2:
+                raise Interrupted()
+            return super().create(*args, **kwargs)
+
+    chunks = [f"chunk {i} text\n\n{i + 1}\n\nmore" for i in range(4)]
+    try:
+        clean_chunks(chunks, InterruptingClient(), "dep", 0.1, 4000, cache=LLMCache(tmp_path, "ns"))
+    except Interrupted:
+        pass
+
+    rerun = fake_chat_client()
+    cleaned = clean_chunks(chunks, rerun, "dep", 0.1, 4000, cache=LLMCache(tmp_path, "ns"))
+
+    assert rerun.calls == 2
+    assert cleaned == [c.upper() for c in chunks]
+
+
+def test_translation_repeats_and_reruns_hit_the_cache(tmp_path: Path):
+    from scan2epub.epub.translator import EPUBTranslator
+
+    class UpperTranslator:
+        def __init__(self):
+            self.sent = []
+
+        def translate_text(self, segments, to_lang, from_lang=None):
+            self.sent.extend(segments)
+            return [s.upper() for s in segments]
+
+    paragraphs = ["Első fejezet", "12", "alma", "Első fejezet"]
+    first = UpperTranslator()
+    out = EPUBTranslator(first, cache_dir=tmp_path)._translate_paragraphs(paragraphs, "en", None, None)
+    second = UpperTranslator()
+    again = EPUBTranslator(second, cache_dir=tmp_path)._translate_paragraphs(paragraphs, "en", None, None)
+
+    assert first.sent == ["Első fejezet", "alma"]
+    assert second.sent == []
+    assert again == out == ["ELSŐ FEJEZET", "12", "ALMA", "ELSŐ FEJEZET"]
+
+
+def test_translation_rejects_a_short_batch():
+    from scan2epub.epub.translator import EPUBTranslator
+
+    class DroppingTranslator:
+        def translate_text(self, segments, to_lang, from_lang=None):
+            return [s.upper() for s in segments[1:]]
+
+    with pytest.raises(TranslationError):
+        EPUBTranslator(DroppingTranslator())._translate_paragraphs(["alma", "körte"], "en", None, None)
@@ -0,0 +1,46 @@
+import json
+import re
+
+from scan2epub.epub.cleaner import _MARSHAL_PROMPT, _parse_marshaled, clean_chunks, marshal_groups
+
+
+def test_marshal_groups_respect_batch_size_and_budget(monkeypatch):
+    # One token per character keeps the budgets independent of whether tiktoken is installed
+    monkeypatch.setattr("scan2epub.epub.cleaner.count_tokens", len)
+    chunks = ["a" * 100, "b" * 100, "c" * 100, "d" * 2000, "e" * 100]
+
+    assert marshal_groups(chunks, batch_size=2, max_tokens_response=4000) == [[0, 1], [2, 3], [4]]
+    assert marshal_groups(chunks, batch_size=8, max_tokens_response=500) == [[0, 1, 2], [3], [4]]
+    assert marshal_groups(chunks, batch_size=1, max_tokens_response=4000) == [[0], [1], [2], [3], [4]]
+
+
+def test_parse_marshaled_accepts_only_matching_string_arrays():
+    assert _parse_marshaled('[" egy ", "kettő"]', 2) == ["egy", "kettő"]
+    assert _parse_marshaled('```json\n["egy", "kettő"]\n```', 2) == ["egy", "kettő"]
+    assert _parse_marshaled('["egy"]', 2) is None
+    assert _parse_marshaled('["egy", 2]', 2) is None
+    assert _parse_marshaled('{"0": "egy", "1": "kettő"}', 2) is None
+    assert _parse_marshaled("egy\n\nkettő", 2) is None
+
+
+def test_marshaled_groups_and_per_chunk_fallback(fake_chat_client):
+    chunks = [f"chunk {i} text\n\n{i + 1}\n\nmore" for i in range(3)]
+
+    class MarshalingClient(fake_chat_client):
+        """Answers marshaled requests with a JSON array, single-chunk requests like the base fake."""
+
+        def create(self, model, messages, temperature, max_tokens, stream=False):
+            response = super().create(model, messages, temperature, max_tokens, stream)
+            if messages[0]["content"] == _MARSHAL_PROMPT:
+                parts = re.findall(r"<<<(.*?)>>>", messages[-1]["content"], flags=re.S)
+                response.choices[0].message.content = json.dumps([p.upper() for p in parts])
+            return response
+
+    marshaling = MarshalingClient()
+    assert clean_chunks(chunks, marshaling, "dep", 0.1, 4000, marshal_batch_size=4) == [c.upper() for c in chunks]
+    assert marshaling.calls == 1
+
+    # The plain fake echoes the numbered group instead of a JSON array: every chunk is retried alone
+    plain = fake_chat_client()
+    assert clean_chunks(chunks, plain, "dep", 0.1, 4000, marshal_batch_size=4) == [c.upper() for c in chunks]
+    assert plain.calls == 1 + len(chunks)
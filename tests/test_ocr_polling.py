@@ -0,0 +1,75 @@
+import pytest
+
+import scan2epub.ocr.azure_cu as azure_cu
+from scan2epub.ocr.azure_cu import PDFOCRProcessor
+
+
+class _PollResp:
+    def __init__(self, status, retry_after=None):
+        self._status = status
+        self.headers = {"Retry-After": retry_after} if retry_after else {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"status": self._status, "result": {"contents": []} if self._status == "Succeeded" else None}
+
+
+class _PollSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.gets = 0
+
+    def get(self, url):
+        self.gets += 1
+        return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """time.sleep advances time.monotonic instead of waiting; returns the list of sleeps."""
+    sleeps = []
+    now = [1000.0]
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr(azure_cu.time, "sleep", sleep)
+    monkeypatch.setattr(azure_cu.time, "monotonic", lambda: now[0])
+    return sleeps
+
+
+def _processor(monkeypatch, responses):
+    monkeypatch.setenv("AZURE_CU_ENDPOINT", "https://cu.example")
+    monkeypatch.setenv("AZURE_CU_API_KEY", "dummy")
+    processor = PDFOCRProcessor()
+    processor._session = _PollSession(responses)
+    return processor
+
+
+def test_polling_backs_off_and_honors_retry_after(monkeypatch, fake_clock):
+    processor = _processor(monkeypatch, [
+        _PollResp("NotStarted"),
+        _PollResp("Running"),
+        _PollResp("Running", retry_after="4"),
+        _PollResp("Running", retry_after="120"),
+        _PollResp("Succeeded"),
+    ])
+
+    assert processor._get_analyze_result("op-1") == {"contents": []}
+    # 1s growing by 1.5x; Retry-After replaces the computed delay but is capped at 15s
+    assert fake_clock == [1.0, 1.5, 4.0, 15.0]
+    assert processor._session.gets == 5
+
+
+def test_polling_gives_up_after_the_budget(monkeypatch, fake_clock):
+    processor = _processor(monkeypatch, [_PollResp("Running")])
+
+    with pytest.raises(TimeoutError):
+        processor._get_analyze_result("op-1")
+
+    assert max(fake_clock) == 15.0
+    assert sum(fake_clock) <= 300
+    assert sum(fake_clock) + 15.0 > 300
@@ -0,0 +1,34 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import scan2epub.pipeline as pipeline
+from scan2epub.utils.errors import LLMError
+
+
+def test_failed_pipeline_removes_interim_files_and_closes_status(monkeypatch, tmp_path: Path):
+    scratch = tmp_path / "tmp"
+    scratch.mkdir()
+    monkeypatch.setattr(pipeline.tempfile, "tempdir", str(scratch))
+
+    def fake_ocr(cfg, input_path, output_epub, **kwargs):
+        Path(output_epub).write_bytes(b"interim")
+        return output_epub, None
+
+    def failing_cleanup(cfg, input_epub, output_epub, **kwargs):
+        assert Path(input_epub).parent.parent == scratch
+        raise LLMError("simulated cleanup failure")
+
+    monkeypatch.setattr(pipeline, "run_ocr_to_epub", fake_ocr)
+    monkeypatch.setattr(pipeline, "run_cleanup", failing_cleanup)
+    status_file = tmp_path / "status.jsonl"
+
+    with pytest.raises(LLMError) as excinfo:
+        pipeline.run_full_pipeline(None, "book.pdf", str(tmp_path / "out" / "book.epub"), status_file=status_file)
+
+    # The traceback still references the pipeline frame, so only an explicit cleanup empties the dir
+    assert excinfo.tb is not None
+    assert list(scratch.iterdir()) == []
+    stages = [json.loads(line)["stage"] for line in status_file.read_text(encoding="utf-8").splitlines()]
+    assert stages == ["pipeline_start", "ocr_done", "cleanup_start"]
@@ -76,3 +76,57 @@ def test_preflight_checker_status_events_on_translator_failure(monkeypatch, tmp_
     events = [(e.get("event"), e.get("stage")) for e in lines]
     assert ("preflight", "preflight_start") in events
     assert ("preflight", "translator_failed") in events
+
+
+def test_run_translate_aborts_on_auth_failure_without_partial_output(monkeypatch, tmp_path: Path):
+    """
+    A 401/403 during translation (after a passing preflight) must surface as TranslationError
+    and leave no output EPUB, instead of silently producing an untranslated book.
+    """
+    import requests
+    from ebooklib import epub
+    from scan2epub.epub.writer import write_epub_file
+    import scan2epub.translate.translator as tr_mod
+
+    monkeypatch.setenv("AZURE_TRANSLATOR_KEY", "dummy-key")
+    monkeypatch.setattr(tr_mod.AzureTranslator, "preflight_check", lambda self, to_lang, from_lang=None: None)
+    posts = []
+
+    class _Unauthorized:
+        status_code = 401
+        headers = {}
+        text = '{"error":{"code":401000}}'
+
+        def json(self):
+            return {"error": {"code": 401000}}
+
+    def fake_post(self, url, **kwargs):
+        posts.append(url)
+        return _Unauthorized()
+
+    monkeypatch.setattr(requests.Session, "post", fake_post)
+
+    book = epub.EpubBook()
+    book.set_identifier("auth-test")
+    book.set_title("Próba")
+    book.set_language("hu")
+    chapter = epub.EpubHtml(title="Első", file_name="chap_1.xhtml", lang="hu")
+    chapter.content = "<html><body><p>Első bekezdés.</p><p>Második bekezdés.</p></body></html>"
+    book.add_item(chapter)
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    book.spine = ["nav", chapter]
+    input_epub = tmp_path / "in.epub"
+    write_epub_file(input_epub, book)
+    output_epub = tmp_path / "out.epub"
+
+    with pytest.raises(TranslationError):
+        run_translate(
+            cfg=AppConfig.from_env_and_ini(None),
+            input_epub=str(input_epub),
+            output_epub=str(output_epub),
+            to_lang="en",
+        )
+
+    assert len(posts) == 1, "auth failures must not be retried"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["in.epub"]
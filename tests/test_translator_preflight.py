@@ -6,10 +6,11 @@ from scan2epub.utils.errors import TranslationError
 
 
 class _MockResp:
-    def __init__(self, status_code=200, json_data=None, text=""):
+    def __init__(self, status_code=200, json_data=None, text="", headers=None):
         self.status_code = status_code
         self._json = json_data
         self.text = text
+        self.headers = headers or {}
 
     def json(self):
         if self._json is None:
@@ -30,7 +31,7 @@ class _MockSession:
         self.last_params = None
         self.last_json = None
 
-    def post(self, url, params=None, json=None, headers=None, timeout=None):
+    def post(self, url, params=None, json=None, data=None, headers=None, timeout=None):
         self.post_calls += 1
         self.posts.append((url, params, json, headers, timeout))
         self.last_headers = headers
@@ -110,3 +111,27 @@ def test_preflight_includes_region_header_when_provided():
     assert sess.last_params.get("to") == "de"
     # body must be tiny ping
     assert isinstance(sess.last_json, list) and sess.last_json[0].get("Text") == "ping"
+
+
+def test_translate_honors_retry_after_and_fails_fast_on_auth(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("scan2epub.translate.translator.time.sleep", sleeps.append)
+    sess = _MockSession([
+        _MockResp(429, json_data={"error": {"code": 429001}}, headers={"Retry-After": "7"}),
+        _MockResp(503, json_data={"error": {"code": 503000}}, headers={"Retry-After": "86400"}),
+        _MockResp(200, json_data=[{"translations": [{"text": "apple"}]}]),
+        _MockResp(401, json_data={"error": {"code": 401000}}),
+    ])
+    tr = AzureTranslator(
+        endpoint="https://api.cognitive.microsofttranslator.com",
+        api_key="dummy",
+        region=None,
+        api_version="3.0",
+        session=sess,
+        timeout_s=5,
+    )
+    assert tr.translate_text(["alma"], "en") == ["apple"]
+    assert sleeps == [7.0, 30.0]
+    with pytest.raises(TranslationError):
+        tr.translate_text(["körte"], "en")
+    assert sess.post_calls == 4